@@ -0,0 +1,266 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from itertools import takewhile
+from typing import List
+
+import numpy as np
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.trading_agent import build_app
+from tools.latency import LatencyRecorder
+
+# Tool calls the scripted model makes for every user message, in order
+DEFAULT_STEPS = ["drift_candle_data", "BacktestingTool", "DriftOrderTool"]
+
+BENCHMARK_STRATEGY = """
+from typing import Dict, Optional, Union
+import pandas as pd
+from datetime import datetime
+
+def strategy(
+    window_data: pd.DataFrame, positions: pd.DataFrame
+) -> Optional[Dict[str, Union[int, float, datetime]]]:
+    fast_ma = 10
+    slow_ma = 30
+
+    if len(window_data) >= slow_ma:
+        fast_ma_current = window_data["fillOpen"][-fast_ma:].mean()
+        slow_ma_current = window_data["fillOpen"][-slow_ma:].mean()
+        fast_ma_prev = window_data["fillOpen"][-fast_ma - 1 : -1].mean()
+        slow_ma_prev = window_data["fillOpen"][-slow_ma - 1 : -1].mean()
+        last_row = window_data.iloc[-1]
+
+        if fast_ma_prev <= slow_ma_prev and fast_ma_current > slow_ma_current:
+            return {"Size": 1, "Entry Time": last_row["start"], "Entry Price": last_row["fillOpen"]}
+        elif fast_ma_prev >= slow_ma_prev and fast_ma_current < slow_ma_current:
+            return {"Size": -1, "Entry Time": last_row["start"], "Entry Price": last_row["fillOpen"]}
+
+    return None
+"""
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays a fixed tool-call sequence without any API calls.
+
+    After the n-th tool result following the latest user message it requests
+    steps[n]; once the script is done it reports the tool results. The reply
+    depends only on the conversation, so concurrent threads can share it.
+    """
+
+    steps: List[str] = DEFAULT_STEPS
+    symbol: str = "SOL"
+    resolution: str = "15"
+    year: str = "2024"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _tool_args(self, name, results):
+        if name == "drift_candle_data":
+            return {
+                "base_asset_symbol": self.symbol,
+                "resolution": self.resolution,
+                "year": self.year,
+            }
+        if name == "BacktestingTool":
+            # The candle tool reports the path it downloaded to last
+            data_file = results[0].content.rsplit(" to ", 1)[-1]
+            return {"strategy_code": BENCHMARK_STRATEGY, "data_file": data_file}
+        if name == "DriftOrderTool":
+            return {"amount": 0.1, "direction": "long", "symbol": self.symbol}
+        raise ValueError(f"No scripted arguments for {name}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        since_user = list(takewhile(lambda m: m.type != "human", reversed(messages)))
+        results = [m for m in reversed(since_user) if m.type == "tool"]
+
+        step = len(results)
+        if step < len(self.steps):
+            name = self.steps[step]
+            call = {
+                "name": name,
+                "args": self._tool_args(name, results),
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+            }
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            report = "\n".join(f"{m.name}: {m.content}" for m in results)
+            message = AIMessage(content=f"Here is what I found:\n{report}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def write_candle_fixture(path, bars=400, seed=7):
+    """Write a deterministic 15 minute candle file in Drift's CSV layout"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01").value // 1_000_000
+    # A slow cycle plus noise, so moving average strategies trade regularly
+    steps = np.arange(bars)
+    close = 100 + 5 * np.sin(steps / 20) + rng.normal(0, 0.5, bars).cumsum()
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    pd.DataFrame(
+        {
+            "start": start + steps * 15 * 60 * 1000,
+            "fillOpen": open_,
+            "fillHigh": np.maximum(open_, close) + 0.2,
+            "fillLow": np.minimum(open_, close) - 0.2,
+            "fillClose": close,
+            "baseVolume": rng.uniform(100, 1000, bars),
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+def _record_event(event, recorder, starts):
+    """Time graph nodes and tools from astream_events v2 events"""
+    kind = event["event"]
+    if kind in ("on_chain_start", "on_chain_end"):
+        name = event["name"]
+        if name.startswith("__") or name != event["metadata"].get("langgraph_node"):
+            return
+        stage = f"node:{event['name']}"
+    elif kind in ("on_tool_start", "on_tool_end"):
+        stage = f"tool:{event['name']}"
+    else:
+        return
+
+    if kind.endswith("_start"):
+        starts[event["run_id"]] = time.perf_counter()
+    elif event["run_id"] in starts:
+        recorder.record(stage, time.perf_counter() - starts.pop(event["run_id"]))
+
+
+async def _run_thread(app, turns, recorder):
+    """Run one conversation of `turns` user messages, then drop its checkpoints"""
+    thread_id = f"benchmark-{uuid.uuid4().hex}"
+    config = {"configurable": {"thread_id": thread_id}}
+    starts = {}
+    for _ in range(turns):
+        turn_start = time.perf_counter()
+        async for event in app.astream_events(
+            {"messages": [HumanMessage("Backtest a moving average cross on SOL")]},
+            config,
+            version="v2",
+        ):
+            _record_event(event, recorder, starts)
+        recorder.record("turn", time.perf_counter() - turn_start)
+    app.checkpointer.delete_thread(thread_id)
+
+
+async def run_benchmark(
+    turns=200, turns_per_thread=5, concurrency=1, warmup=5, bars=400, steps=None
+):
+    """Drive the agent graph offline with a ScriptedChatModel.
+
+    Candle downloads are served from a generated fixture, backtests run on
+    the real worker pool and orders go to a StubDriftClient, so nothing
+    leaves the machine. Memory growth is measured with tracemalloc from the
+    end of the warmup turns to the end of the run; every conversation's
+    checkpoints are deleted when it ends, so growth means something leaks.
+
+    Returns turns/second, per-node and per-tool latency percentiles in
+    milliseconds and memory growth in KiB.
+    """
+    from tools.backtesting_tool import BacktestingTool
+    from tools.drift_interface import build_drift_client, configure, shutdown
+    from tools.drift_place_order import DriftOrderTool
+    from tools.drift_tools import DriftCandleDataTool, candle_cache
+    from tools.event_loop import run_in_background
+    from tools.order_replay import StubDriftClient
+
+    fixture_dir = tempfile.mkdtemp(prefix="agent-benchmark-")
+    model = ScriptedChatModel(steps=steps or DEFAULT_STEPS)
+    write_candle_fixture(
+        os.path.join(
+            fixture_dir, f"perp_{model.symbol}_{model.resolution}_{model.year}.csv"
+        ),
+        bars=bars,
+    )
+    app = build_app(
+        model=model,
+        tools=[
+            DriftCandleDataTool(download_dir=fixture_dir),
+            BacktestingTool(results_dir=fixture_dir),
+            DriftOrderTool(),
+        ],
+    )
+    configure(client_factory=StubDriftClient)
+    # Keep the fixture paths out of the persistent tool cache
+    persist, candle_cache.persist = candle_cache.persist, False
+
+    recorder = LatencyRecorder(window=None)
+    try:
+        await _run_thread(app, warmup, LatencyRecorder())
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        threads = -(-turns // turns_per_thread)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_limited(n):
+            async with semaphore:
+                await _run_thread(app, n, recorder)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_limited(min(turns_per_thread, turns - i * turns_per_thread))
+                for i in range(threads)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        candle_cache.persist = persist
+        await run_in_background(shutdown())
+        configure(client_factory=build_drift_client)
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    return {
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed,
+        "latency_ms": recorder.summary(),
+        "memory_growth_kib": (current - baseline) / 1024,
+        "memory_peak_kib": (peak - baseline) / 1024,
+    }
+
+
+def main(turns=200, concurrency=1):
+    result = asyncio.run(run_benchmark(turns=turns, concurrency=concurrency))
+    print(
+        f"{result['turns']} turns in {result['seconds']:.2f}s "
+        f"({result['turns_per_second']:.1f} turns/s)"
+    )
+    print(f"{'stage':<28} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'count':>6}")
+    for stage, stats in sorted(result["latency_ms"].items()):
+        print(
+            f"{stage:<28} {stats['p50']:>9.2f} {stats['p90']:>9.2f} "
+            f"{stats['p99']:>9.2f} {stats['count']:>6}"
+        )
+    print(
+        f"memory growth {result['memory_growth_kib']:.1f} KiB, "
+        f"peak {result['memory_peak_kib']:.1f} KiB above baseline"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        turns=int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        concurrency=int(sys.argv[2]) if len(sys.argv) > 2 else 1,
+    )
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import sqlite3
+
+from langchain_core.messages import AIMessage, RemoveMessage, ToolMessage
+
+DEFAULT_DB_PATH = os.getenv("AGENT_CHECKPOINT_DB", "checkpoints.sqlite")
+
+CODE_BLOCK = re.compile(r"```.*?```", re.DOTALL)
+
+COMPACTED_MARKER = "compacted: sha256:"
+
+
+def open_checkpointer(path=DEFAULT_DB_PATH):
+    """Disk-backed checkpointer so conversations survive restarts"""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    conn = sqlite3.connect(path, check_same_thread=False)
+    return SqliteSaver(conn)
+
+
+def open_async_checkpointer(path=DEFAULT_DB_PATH):
+    """Async context manager yielding a disk-backed checkpointer for async graphs"""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    return AsyncSqliteSaver.from_conn_string(path)
+
+
+class BlobStore:
+    """Originals of compacted message parts, keyed by content hash"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS compacted_blobs "
+            "(hash TEXT PRIMARY KEY, content TEXT NOT NULL)"
+        )
+
+    def put(self, content):
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO compacted_blobs (hash, content) VALUES (?, ?)",
+            (digest, content),
+        )
+        self.conn.commit()
+        return digest
+
+    def get(self, digest_prefix):
+        row = self.conn.execute(
+            "SELECT content FROM compacted_blobs WHERE hash LIKE ?",
+            (f"{digest_prefix}%",),
+        ).fetchone()
+        return row[0] if row else None
+
+
+def _placeholder(content, blobs, label):
+    digest = (
+        blobs.put(content) if blobs else hashlib.sha256(content.encode()).hexdigest()
+    )
+    return f"[{label} {COMPACTED_MARKER}{digest[:12]}, {len(content)} chars]"
+
+
+def _compact_message(message, max_chars, blobs):
+    """Compacted copy of message, or None if it is already small"""
+    if isinstance(message, ToolMessage):
+        content = message.content
+        if (
+            isinstance(content, str)
+            and len(content) > max_chars
+            and COMPACTED_MARKER not in content
+        ):
+            summary = content[: max_chars // 2].rstrip()
+            placeholder = _placeholder(content, blobs, "tool output")
+            return message.model_copy(update={"content": f"{summary}... {placeholder}"})
+        return None
+
+    update = {}
+    if isinstance(message.content, str) and len(message.content) > max_chars:
+        # Code blocks, e.g. strategy source, are what makes these long
+        content = CODE_BLOCK.sub(
+            lambda m: (
+                _placeholder(m.group(0), blobs, "code")
+                if len(m.group(0)) > max_chars
+                else m.group(0)
+            ),
+            message.content,
+        )
+        if content != message.content:
+            update["content"] = content
+
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tool_calls = []
+        for call in message.tool_calls:
+            args = {
+                key: (
+                    _placeholder(value, blobs, key)
+                    if isinstance(value, str) and len(value) > max_chars
+                    else value
+                )
+                for key, value in call["args"].items()
+            }
+            tool_calls.append({**call, "args": args})
+        if tool_calls != message.tool_calls:
+            update["tool_calls"] = tool_calls
+            # The raw provider payload would otherwise still carry the full args
+            update["additional_kwargs"] = {
+                k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"
+            }
+
+    return message.model_copy(update=update) if update else None
+
+
+def compact_messages(
+    messages, keep_recent=6, max_chars=800, max_messages=60, blobs=None
+):
+    """Message updates that keep a conversation's prompt size bounded.
+
+    Messages older than the last keep_recent have long tool outputs, long
+    tool-call arguments (strategy code) and long code blocks replaced by a
+    short summary and content hash; originals go to blobs. When the history
+    is longer than max_messages, the oldest turns are removed whole, starting
+    at a human message so tool calls are never split from their results.
+
+    Returns replacement and RemoveMessage entries for the "messages" channel.
+    """
+    updates = []
+
+    excess = len(messages) - max_messages
+    first_kept = 0
+    if excess > 0:
+        for i, message in enumerate(messages):
+            if i >= excess and message.type == "human":
+                first_kept = i
+                break
+        updates.extend(RemoveMessage(id=m.id) for m in messages[:first_kept])
+
+    old = messages[first_kept : max(first_kept, len(messages) - keep_recent)]
+    for message in old:
+        compacted = _compact_message(message, max_chars, blobs)
+        if compacted is not None:
+            updates.append(compacted)
+    return updates
+
+
+def compact_thread(app, config, blobs=None, **kwargs):
+    """Compact the stored history of the thread in config"""
+    state = app.get_state(config)
+    updates = compact_messages(state.values.get("messages", []), blobs=blobs, **kwargs)
+    if updates:
+        app.update_state(config, {"messages": updates})
+    return len(updates)
+
+
+async def acompact_thread(app, config, blobs=None, **kwargs):
+    """Async version of compact_thread"""
+    state = await app.aget_state(config)
+    updates = compact_messages(state.values.get("messages", []), blobs=blobs, **kwargs)
+    if updates:
+        await app.aupdate_state(config, {"messages": updates})
+    return len(updates)
+
+
+def prune_checkpoints(conn, thread_id, keep=5):
+    """Delete all but the latest `keep` checkpoints of a thread.
+
+    Checkpoint ids sort by creation time, so the subgraph checkpoints and
+    pending writes older than the oldest kept checkpoint go as well.
+    """
+    rows = conn.execute(
+        "SELECT checkpoint_id FROM checkpoints "
+        "WHERE thread_id = ? AND checkpoint_ns = '' "
+        "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+        (thread_id, keep - 1),
+    ).fetchall()
+    if not rows:
+        return 0
+    oldest_kept = rows[0][0]
+    deleted = 0
+    for table in ("checkpoints", "writes"):
+        cursor = conn.execute(
+            f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < ?",
+            (thread_id, oldest_kept),
+        )
+        deleted += cursor.rowcount
+    conn.commit()
+    return deleted
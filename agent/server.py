@@ -0,0 +1,161 @@
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.memory import (
+    DEFAULT_DB_PATH,
+    BlobStore,
+    acompact_thread,
+    open_async_checkpointer,
+    prune_checkpoints,
+)
+from agent.trading_agent import build_app
+from tools.registry import close_tools
+from tools.tool_cache import cache_stats
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+
+class SessionLimiter:
+    """Admission control for agent turns.
+
+    At most max_concurrent turns run at once across all sessions and each
+    session runs at most per_session turns at a time; further turns queue.
+    Once max_pending turns are queued or running, new ones are rejected so
+    callers back off instead of piling up.
+    """
+
+    def __init__(self, max_concurrent=8, per_session=1, max_pending=64):
+        self.turn_slots = asyncio.Semaphore(max_concurrent)
+        self.per_session = per_session
+        self.max_pending = max_pending
+        self.pending = 0
+        self._sessions = {}
+
+    def admit(self, session_id):
+        """Reserve a place for a turn, or return False when overloaded"""
+        if self.pending >= self.max_pending:
+            return False
+        self.pending += 1
+        slots, count = self._sessions.get(
+            session_id, (asyncio.Semaphore(self.per_session), 0)
+        )
+        self._sessions[session_id] = (slots, count + 1)
+        return True
+
+    def release(self, session_id):
+        self.pending -= 1
+        slots, count = self._sessions[session_id]
+        if count == 1:
+            del self._sessions[session_id]
+        else:
+            self._sessions[session_id] = (slots, count - 1)
+
+    def session_slots(self, session_id):
+        return self._sessions[session_id][0]
+
+
+async def handle_message(request):
+    """POST /sessions/{session_id}/messages with {"message": "..."}"""
+    session_id = request.match_info["session_id"]
+    if not SESSION_ID.match(session_id):
+        return web.json_response({"error": "Invalid session id"}, status=400)
+    try:
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Body must be valid JSON"}, status=400)
+    message = body.get("message", "") if isinstance(body, dict) else ""
+    if not message:
+        return web.json_response({"error": "message is required"}, status=400)
+
+    limiter = request.app["limiter"]
+    if not limiter.admit(session_id):
+        return web.json_response(
+            {"error": "Server busy, retry later"},
+            status=429,
+            headers={"Retry-After": "1"},
+        )
+    try:
+        async with limiter.session_slots(session_id), limiter.turn_slots:
+            reply = await run_turn(request.app, session_id, message)
+    finally:
+        limiter.release(session_id)
+    return web.json_response({"session_id": session_id, "reply": reply})
+
+
+def _prune_session(db_path, session_id):
+    """prune_checkpoints on a connection of its own, for use off the loop.
+
+    The shared connection is only used on the loop thread, so its
+    transactions never interleave with a prune running in a worker thread.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return prune_checkpoints(conn, session_id)
+    finally:
+        conn.close()
+
+
+async def run_turn(app, session_id, message):
+    """Run one agent turn on the session's own thread"""
+    from langchain_core.messages import HumanMessage
+
+    config = {"configurable": {"thread_id": session_id}}
+    response = await app["agent"].ainvoke({"messages": [HumanMessage(message)]}, config)
+    await acompact_thread(app["agent"], config, blobs=app["blobs"])
+    await asyncio.to_thread(_prune_session, app["db_path"], session_id)
+    return response["messages"][-1].content
+
+
+async def handle_health(request):
+    limiter = request.app["limiter"]
+    return web.json_response(
+        {
+            "status": "ok",
+            "pending_turns": limiter.pending,
+            "tool_cache": cache_stats(),
+        }
+    )
+
+
+async def agent_context(app):
+    """Open the shared checkpointer and compile the agent for the server's life"""
+    async with open_async_checkpointer(app["db_path"]) as checkpointer:
+        app["db"] = sqlite3.connect(app["db_path"])
+        app["blobs"] = BlobStore(app["db"])
+        app["agent"] = build_app(checkpointer=checkpointer)
+        yield
+        app["db"].close()
+    await close_tools()
+
+
+def create_server(
+    db_path=DEFAULT_DB_PATH, max_concurrent=8, per_session=1, max_pending=64
+):
+    """aiohttp application serving one agent thread per session id.
+
+    Backtests from every session share the BacktestingTool worker pool and
+    candle downloads share one store, see tools.backtesting_tool and
+    tools.drift_tools.
+    """
+    app = web.Application()
+    app["db_path"] = db_path
+    app["limiter"] = SessionLimiter(max_concurrent, per_session, max_pending)
+    app.cleanup_ctx.append(agent_context)
+    app.router.add_post("/sessions/{session_id}/messages", handle_message)
+    app.router.add_get("/health", handle_health)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(
+        create_server(max_concurrent=int(os.getenv("AGENT_MAX_CONCURRENT", 8))),
+        host=os.getenv("AGENT_HOST", "127.0.0.1"),
+        port=int(os.getenv("AGENT_PORT", 8080)),
+    )
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the agent does before showing the first prompt
+STARTUP_CODE = "from agent.trading_agent import build_app; build_app()"
+
+# The same startup with every tool module imported up front, for comparison
+EAGER_CODE = (
+    "import tools.sol_balance, tools.drift_tools, tools.backtesting_tool, "
+    "tools.drift_place_order; " + STARTUP_CODE
+)
+
+
+def run_with_importtime(code):
+    """Run code in a fresh interpreter with -X importtime.
+
+    Returns the wall time in seconds and the import-time lines as
+    (self_us, cumulative_us, module) tuples.
+    """
+    # A dummy key lets the model client be constructed without calling OpenAI
+    env = {"OPENAI_API_KEY": "startup-benchmark", **os.environ}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        imports.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return wall_time, imports
+
+
+def import_time_report(code=STARTUP_CODE, top=15):
+    """Format the slowest top-level imports of code, like -X importtime"""
+    wall_time, imports = run_with_importtime(code)
+    # Top-level packages are the lines without nesting indentation
+    top_level = [i for i in imports if not i[2].startswith("  ")]
+    top_level.sort(key=lambda i: i[1], reverse=True)
+
+    lines = [f"startup: {wall_time:.3f}s, {len(imports)} modules imported"]
+    lines.append(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for self_us, cumulative_us, module in top_level[:top]:
+        lines.append(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f} {module}")
+    return "\n".join(lines)
+
+
+def main(runs=3):
+    for label, code in [("lazy", STARTUP_CODE), ("eager", EAGER_CODE)]:
+        times = sorted(run_with_importtime(code)[0] for _ in range(runs))
+        print(f"{label} startup to first prompt: {times[len(times) // 2]:.3f}s")
+    print()
+    print(import_time_report())
+
+
+if __name__ == "__main__":
+    main()
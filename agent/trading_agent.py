@@ -1,53 +1,21 @@
 from dotenv import load_dotenv
 
+import asyncio
+import sqlite3
 import sys
 import os
-import pandas as pd
-
-# Option 1: Suppress only the SettingWithCopyWarning
-pd.options.mode.chained_assignment = None
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-
-from tools.sol_balance import SolanaBalanceTool
-from tools.drift_tools import DriftCandleDataTool
-from tools.backtesting_tool import BacktestingTool
-from tools.drift_place_order import DriftOrderTool
-
+# Tools are registered as lightweight descriptors; driftpy, solana, pandas and
+# the model client are only imported once they are actually used.
+from tools.registry import close_tools, lazy_tools
 
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import START, MessagesState, StateGraph
-from langchain_core.messages import HumanMessage
-
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-
-
-model = ChatOpenAI(model="gpt-4o-mini")
-tools = [
-    SolanaBalanceTool(),
-    DriftCandleDataTool(),
-    BacktestingTool(),
-    DriftOrderTool(),
-]
-# model = model.bind_tools(tools)
-
-
-# Define a new graph
-workflow = StateGraph(state_schema=MessagesState)
 
-
-from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import SystemMessage
-
-agent = create_react_agent(
-    model=model,
-    tools=tools,
-    state_modifier=SystemMessage(
-        content="""You are an algorithmic trading agent.
+SYSTEM_PROMPT = """You are an algorithmic trading agent.
             Your goal is to make money by trading perpetual contracts on Drift exchange.
             You perform algorithmic trading strategy development and actual trading yourself. 
             Do not suggest a user to use a different exchange or to trade themselves. 
@@ -153,42 +121,150 @@ def golden_cross_death_cross_strategy(
             After the strategy is implemented, ask a user if they want to backtest it on the historical data.
             Use BacktestingTool to test the strategy it. Pass data_file that was returned by DriftCandleDataTool.
             Report the results of the backtesting and give your comments on it.
+            BacktestingTool returns a JSON summary with a result_id. For questions about individual trades of that backtest,
+            use BacktestResultTool with the result_id instead of running the backtest again.
             
             If a user asks to place and order, use DriftOrderTool. Ask for an amount, symbol to trade and long/short position.
             If the trade is executed successful, report the transaction signature returned by DriftOrderTool.
             Placing an order can happen without any prior.
+            If a user asks to place orders on several symbols at once, for example to rebalance a portfolio, use DriftBatchOrderTool with all orders in one call.
+            Report the status and transaction signature of every order.
+            When several tool calls do not depend on each other, for example downloading candle data for several symbols,
+            checking several wallets or backtesting several strategies, request them together in one step so they run in parallel.
                         
             You have access to the following tools:
             - SolanaBalanceTool: Check the SOL balance of a wallet address.
             - DriftCandleDataTool: Download historical candle data from Drift exchange.
             - BacktestingTool: Backtesting on a strategy on historical data.
+            - BacktestResultTool: Reading the trades of a previous backtest.
             - DriftOrderTool: placing orders on Drift exchange.
+            - DriftBatchOrderTool: placing orders on several Drift markets at once.
             """
-    ),
-)
-
-workflow.add_node("agent1", agent)
-workflow.add_edge(START, "agent1")
-
-# Add memory
-memory = MemorySaver()
-app = workflow.compile(checkpointer=memory)
-config = {"configurable": {"thread_id": "abc123"}}
-
-# read user input
-query = "Hi!"
-while query != "":
-    response = app.invoke({"messages": [HumanMessage(query)]}, config)
-    print(response["messages"][-1].pretty_print())
-    query = input(">> ")
-
-
-# Cumulative Return
-# Annualized Return
-# Sharpe Ratio
-# Sortino Ratio
-# Win Rate
-# Maximum Drawdown
-# Volatility
-# Number of Trades
-# Holding Period
+
+
+def build_model():
+    """Chat model behind the agent"""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o-mini")
+
+
+def build_app(model=None, tools=None, checkpointer=None):
+    """Compile the agent graph"""
+    from langchain_core.messages import SystemMessage
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import START, MessagesState, StateGraph
+    from langgraph.prebuilt import create_react_agent
+
+    tools = tools if tools is not None else lazy_tools()
+    if model is None:
+        # Let the model request several independent tools in one step; the
+        # tool node runs the calls of a step concurrently
+        model = build_model().bind_tools(tools, parallel_tool_calls=True)
+
+    agent = create_react_agent(
+        model=model,
+        tools=tools,
+        state_modifier=SystemMessage(content=SYSTEM_PROMPT),
+    )
+
+    # Define a new graph
+    workflow = StateGraph(state_schema=MessagesState)
+    workflow.add_node("agent1", agent)
+    workflow.add_edge(START, "agent1")
+
+    # Add memory
+    return workflow.compile(checkpointer=checkpointer or MemorySaver())
+
+
+async def stream_turn(app, query, config):
+    """Run one turn, printing model tokens and tool events as they happen.
+
+    Returns the turn's timings: time to first token, total time and the
+    duration of every tool call, all in seconds.
+    """
+    from langchain_core.messages import HumanMessage
+
+    start = time.perf_counter()
+    first_token = None
+    tool_starts = {}
+    tool_durations = []
+    streamed_runs = set()
+
+    async for event in app.astream_events(
+        {"messages": [HumanMessage(query)]}, config, version="v2"
+    ):
+        kind = event["event"]
+        if kind in ("on_chat_model_stream", "on_chat_model_end"):
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                streamed_runs.add(event["run_id"])
+            elif event["run_id"] not in streamed_runs:
+                # Models that do not stream only report the whole message
+                content = event["data"]["output"].content
+            else:
+                continue
+            if isinstance(content, str) and content:
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                print(content, end="", flush=True)
+        elif kind == "on_tool_start":
+            tool_starts[event["run_id"]] = time.perf_counter()
+            print(f"\n[{event['name']} started]", flush=True)
+        elif kind == "on_tool_end":
+            duration = time.perf_counter() - tool_starts.pop(event["run_id"], start)
+            tool_durations.append((event["name"], duration))
+            print(f"[{event['name']} finished in {duration:.2f}s]", flush=True)
+
+    timings = {
+        "first_token": first_token,
+        "total": time.perf_counter() - start,
+        "tools": tool_durations,
+    }
+    tools_report = ", ".join(f"{name} {d:.2f}s" for name, d in tool_durations)
+    first_token_report = f"{first_token:.2f}s" if first_token is not None else "n/a"
+    print(
+        f"\n(first token {first_token_report}, turn {timings['total']:.2f}s"
+        + (f", tools: {tools_report})" if tools_report else ")")
+    )
+    return timings
+
+
+async def amain():
+    from agent.memory import (
+        DEFAULT_DB_PATH,
+        BlobStore,
+        acompact_thread,
+        open_async_checkpointer,
+        prune_checkpoints,
+    )
+
+    thread_id = (
+        sys.argv[1] if len(sys.argv) > 1 else os.getenv("AGENT_THREAD_ID", "default")
+    )
+    config = {"configurable": {"thread_id": thread_id}}
+
+    # Conversations persist on disk; pass a thread id to resume one
+    async with open_async_checkpointer(DEFAULT_DB_PATH) as checkpointer:
+        db = sqlite3.connect(DEFAULT_DB_PATH, check_same_thread=False)
+        blobs = BlobStore(db)
+        app = build_app(checkpointer=checkpointer)
+
+        # read user input
+        query = "Hi!"
+        while query != "":
+            await stream_turn(app, query, config)
+            # Keep the prompt resent on every turn from growing without bound
+            await acompact_thread(app, config, blobs=blobs)
+            prune_checkpoints(db, thread_id)
+            query = await asyncio.to_thread(input, ">> ")
+        db.close()
+    await close_tools()
+
+
+def main():
+    asyncio.run(amain())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_DIR = os.getenv("RETRIEVAL_CACHE_DIR", ".retrieval_cache")
+
+TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local embeddings for tests and offline runs.
+
+    Every word is hashed to one of `size` dimensions with a hashed sign, so
+    texts sharing words get similar unit vectors. No model, no network.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.size] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def _namespace(embeddings: Embeddings) -> str:
+    """Identifies the model behind embeddings, so caches of models never mix"""
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "size", "")
+    return f"{type(embeddings).__name__}:{model}"
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper with batched calls and a disk cache by content hash.
+
+    Vectors are stored as float32 blobs in SQLite under the sha256 of the
+    model namespace and the text, so re-embedding unchanged chunks costs no
+    calls. Missing texts are sent to the wrapped embeddings in batches of
+    batch_size. `calls` and `embedded` count the requests and texts that
+    reached the wrapped embeddings.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        batch_size: int = 256,
+        namespace: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.namespace = namespace or _namespace(embeddings)
+        self.calls = 0
+        self.embedded = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(
+            os.path.join(cache_dir, "embeddings.sqlite"), check_same_thread=False
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode()).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            # SQLite limits the number of parameters of one statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self.conn.execute(
+                    "SELECT hash, vector FROM embeddings WHERE hash IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype=np.float32)) for k, v in rows)
+        return found
+
+    def _store(self, keys: List[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+                [(k, v.tobytes()) for k, v in zip(keys, vectors)],
+            )
+            self.conn.commit()
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """float32 matrix with one row per text, embedding only uncached texts"""
+        keys = [self.key(text) for text in texts]
+        vectors = self._lookup(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        missing_keys = list(missing)
+        for i in range(0, len(missing_keys), self.batch_size):
+            batch = missing_keys[i : i + self.batch_size]
+            batch_vectors = np.asarray(
+                self.embeddings.embed_documents([missing[k] for k in batch]),
+                dtype=np.float32,
+            )
+            self.calls += 1
+            self.embedded += len(batch)
+            self._store(batch, batch_vectors)
+            vectors.update(zip(batch, batch_vectors))
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_matrix([text])[0].tolist()
+
+    def close(self) -> None:
+        self.conn.close()
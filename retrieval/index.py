@@ -0,0 +1,100 @@
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from retrieval.embeddings import CachedEmbeddings
+
+
+class VectorIndex:
+    """Cosine similarity search over a memory-mapped float32 matrix.
+
+    build() embeds the documents through a CachedEmbeddings, normalizes the
+    rows and writes them to path/vectors.npy next to the documents in
+    path/documents.jsonl. Searching maps the matrix read-only, so opening
+    an index costs no embedding calls and the vectors are paged in lazily;
+    top-k is one matrix-vector product and an argpartition.
+    """
+
+    def __init__(self, path: str, embeddings: Embeddings):
+        self.path = path
+        self.embeddings = embeddings
+        self._vectors: Optional[np.ndarray] = None
+        self._documents: Optional[List[Document]] = None
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def documents_path(self) -> str:
+        return os.path.join(self.path, "documents.jsonl")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.vectors_path) and os.path.exists(self.documents_path)
+
+    def build(self, documents: List[Document]) -> int:
+        """Embed documents and replace the stored index; returns its size"""
+        texts = [d.page_content for d in documents]
+        if isinstance(self.embeddings, CachedEmbeddings):
+            vectors = self.embeddings.embed_matrix(texts)
+        else:
+            vectors = np.asarray(
+                self.embeddings.embed_documents(texts), dtype=np.float32
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        os.makedirs(self.path, exist_ok=True)
+        # Write next to the targets and rename, so readers never see a mix
+        with open(f"{self.vectors_path}.part", "wb") as f:
+            np.save(f, vectors.astype(np.float32))
+        with open(f"{self.documents_path}.part", "w") as f:
+            for document in documents:
+                f.write(
+                    json.dumps(
+                        {
+                            "page_content": document.page_content,
+                            "metadata": document.metadata,
+                        }
+                    )
+                    + "\n"
+                )
+        os.replace(f"{self.vectors_path}.part", self.vectors_path)
+        os.replace(f"{self.documents_path}.part", self.documents_path)
+        self._vectors = self._documents = None
+        return len(documents)
+
+    def load(self) -> "VectorIndex":
+        self._vectors = np.load(self.vectors_path, mmap_mode="r")
+        with open(self.documents_path) as f:
+            self._documents = [Document(**json.loads(line)) for line in f]
+        return self
+
+    def search_by_vector(
+        self, vector: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """The k most similar documents to vector with their cosine similarity"""
+        if self._vectors is None:
+            self.load()
+        if not len(self._documents):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        scores = self._vectors @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._documents[i], float(scores[i])) for i in top]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        return self.search_by_vector(self.embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k)]
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from retrieval.embeddings import CachedEmbeddings
+from retrieval.index import VectorIndex
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_object(digest, obj, seen: set) -> None:
+    """Feed a PDF object and everything it references into digest"""
+    from pypdf.generic import IndirectObject, StreamObject
+
+    if isinstance(obj, IndirectObject):
+        if (obj.idnum, obj.generation) in seen:
+            return
+        seen.add((obj.idnum, obj.generation))
+        obj = obj.get_object()
+    # Image data never changes the extracted text
+    if isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Image":
+        digest.update(obj.get_data())
+    if isinstance(obj, dict):
+        for key in sorted(obj):
+            digest.update(key.encode())
+            _hash_object(digest, obj.raw_get(key), seen)
+    elif isinstance(obj, list):
+        for item in obj:
+            _hash_object(digest, item, seen)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def _page_hash(page) -> str:
+    """Hash of what a page's text is extracted from, without extracting it.
+
+    Covers the content streams and the /Resources they draw with (fonts,
+    their ToUnicode maps and form XObjects).
+    """
+    contents = page.get_contents()
+    digest = hashlib.sha256(contents.get_data() if contents is not None else b"")
+    _hash_object(digest, page.get("/Resources"), set())
+    return digest.hexdigest()
+
+
+def _process_pages(
+    path: str,
+    page_numbers: List[int],
+    known_hashes: Dict[int, str],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> List[Tuple[int, str, Optional[List[dict]]]]:
+    """Hash pages and split the changed ones; runs in a worker process.
+
+    Returns (page number, page hash, chunks) per page, where chunks is None
+    for pages whose hash is in known_hashes.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+    results = []
+    for number in page_numbers:
+        page = reader.pages[number]
+        page_hash = _page_hash(page)
+        if known_hashes.get(number) == page_hash:
+            results.append((number, page_hash, None))
+            continue
+        page_document = Document(
+            page_content=page.extract_text(), metadata={"source": path, "page": number}
+        )
+        chunks = [
+            {"page_content": c.page_content, "metadata": c.metadata}
+            for c in splitter.split_documents([page_document])
+        ]
+        results.append((number, page_hash, chunks))
+    return results
+
+
+def iter_pages(
+    path: str,
+    known_hashes: Dict[int, str],
+    workers: Optional[int] = None,
+    pages_per_task: int = 8,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+) -> Iterator[Tuple[int, str, Optional[List[dict]]]]:
+    """Yield (page number, page hash, chunks or None) for every page, in order.
+
+    Pages are processed by a pool of worker processes in tasks of
+    pages_per_task pages. At most two tasks per worker are in flight, so
+    memory stays bounded however many pages the document has.
+    """
+    from pypdf import PdfReader
+
+    page_count = len(PdfReader(path).pages)
+    tasks = (
+        list(range(start, min(start + pages_per_task, page_count)))
+        for start in range(0, page_count, pages_per_task)
+    )
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for page_numbers in tasks:
+            known = {n: known_hashes[n] for n in page_numbers if n in known_hashes}
+            in_flight.append(
+                pool.submit(
+                    _process_pages, path, page_numbers, known, chunk_size, chunk_overlap
+                )
+            )
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+class PdfIngestor:
+    """Keeps a VectorIndex of a PDF up to date, redoing only what changed.
+
+    A manifest next to the index records the file hash and, per page, the
+    hash of its content streams and resources and its chunks. An unchanged
+    file at the same path is not opened at all; otherwise only pages with a
+    new hash are extracted and re-split, in worker processes, and only
+    chunks whose text is new reach the embedding model, since
+    CachedEmbeddings keys vectors by content.
+    """
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        workers: Optional[int] = None,
+        pages_per_task: int = 8,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        embed_batch: int = 256,
+    ):
+        self.index = index
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embed_batch = embed_batch
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index.path, "manifest.json")
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"file_hash": None, "settings": None, "pages": []}
+        return manifest
+
+    def _save_manifest(self, manifest: dict) -> None:
+        os.makedirs(self.index.path, exist_ok=True)
+        with open(f"{self.manifest_path}.part", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{self.manifest_path}.part", self.manifest_path)
+
+    def ingest(self, path: str) -> Dict[str, int]:
+        """Bring the index up to date with the PDF at path.
+
+        Returns the page and chunk counts, how many pages were re-split and
+        how many chunks were sent to the embedding model.
+        """
+        settings = [self.chunk_size, self.chunk_overlap]
+        manifest = self._load_manifest()
+        if manifest["settings"] != settings:
+            # Chunks split with other settings can't be reused
+            manifest = {"file_hash": None, "settings": settings, "pages": []}
+
+        current_hash = file_hash(path)
+        embedded_before = getattr(self.index.embeddings, "embedded", 0)
+        if (
+            manifest["file_hash"] == current_hash
+            and manifest.get("source") == path
+            and self.index.exists()
+        ):
+            return {
+                "pages": len(manifest["pages"]),
+                "changed_pages": 0,
+                "chunks": sum(len(p["chunks"]) for p in manifest["pages"]),
+                "embedded": 0,
+            }
+
+        known = {n: p["hash"] for n, p in enumerate(manifest["pages"])}
+        pages, changed, pending = [], 0, []
+        for number, page_hash, chunks in iter_pages(
+            path,
+            known,
+            workers=self.workers,
+            pages_per_task=self.pages_per_task,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+        ):
+            if chunks is None:
+                chunks = manifest["pages"][number]["chunks"]
+                for chunk in chunks:
+                    chunk["metadata"]["source"] = path
+            else:
+                changed += 1
+                pending.extend(c["page_content"] for c in chunks)
+            pages.append({"hash": page_hash, "chunks": chunks})
+
+            # Embed while later pages are still being extracted
+            if len(pending) >= self.embed_batch:
+                self._embed(pending)
+                pending = []
+        self._embed(pending)
+
+        documents = [
+            Document(page_content=c["page_content"], metadata=c["metadata"])
+            for page in pages
+            for c in page["chunks"]
+        ]
+        # Every vector is cached by now, so the rebuild makes no calls
+        self.index.build(documents)
+        self._save_manifest(
+            {
+                "file_hash": current_hash,
+                "source": path,
+                "settings": settings,
+                "pages": pages,
+            }
+        )
+        return {
+            "pages": len(pages),
+            "changed_pages": changed,
+            "chunks": len(documents),
+            "embedded": getattr(self.index.embeddings, "embedded", 0) - embedded_before,
+        }
+
+    def _embed(self, texts: List[str]) -> None:
+        if texts and isinstance(self.index.embeddings, CachedEmbeddings):
+            self.index.embeddings.embed_matrix(texts)
@@ -2,47 +2,40 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import os
+import sys
 
-file_path = "./example-data/nke-10k-2023.pdf"
-loader = PyPDFLoader(file_path)
-
-docs = loader.load()
-
-print(len(docs))
-# PyPDFLoader loads one Document object per PDF page. For each, we can easily access:
-print(f"{docs[0].page_content[:200]}\n")
-print(docs[0].metadata)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000, chunk_overlap=200, add_start_index=True
-)
-all_splits = text_splitter.split_documents(docs)
+from retrieval.embeddings import CachedEmbeddings
+from retrieval.index import VectorIndex
+from retrieval.ingest import PdfIngestor
 
-print(len(all_splits))
-
-from langchain_openai import OpenAIEmbeddings
-
-embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+file_path = "./example-data/nke-10k-2023.pdf"
 
-vector_1 = embeddings.embed_query(all_splits[0].page_content)
-vector_2 = embeddings.embed_query(all_splits[1].page_content)
 
-assert len(vector_1) == len(vector_2)
-print(f"Generated vectors of length {len(vector_1)}\n")
-print(vector_1[:10])
+def main():
+    from langchain_openai import OpenAIEmbeddings
 
+    # Vectors are cached on disk by chunk content, so reruns embed nothing;
+    # use retrieval.embeddings.HashingEmbeddings to run without OpenAI
+    embeddings = CachedEmbeddings(OpenAIEmbeddings(model="text-embedding-3-large"))
 
-from langchain_core.vectorstores import InMemoryVectorStore
+    vector_store = VectorIndex("./.retrieval_cache/nke-10k-2023", embeddings)
 
-vector_store = InMemoryVectorStore(embeddings)
+    # Pages are split in worker processes, and only pages that changed since
+    # the last run are split and embedded again
+    ingestor = PdfIngestor(vector_store, chunk_size=1000, chunk_overlap=200)
+    print(ingestor.ingest(file_path))
+    print(f"Embedding calls: {embeddings.calls}, texts embedded: {embeddings.embedded}")
 
-ids = vector_store.add_documents(documents=all_splits)
+    results = vector_store.similarity_search(
+        "How many distribution centers does Nike have in the US?"
+    )
 
+    print(results[0])
+    print(results[0].metadata)
 
-results = vector_store.similarity_search(
-    "How many distribution centers does Nike have in the US?"
-)
 
-print(results[0])
+if __name__ == "__main__":
+    main()
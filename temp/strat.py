@@ -1,7 +1,12 @@
+import os
+import sys
+
 import blankly
 import requests
 
-from blankly.data import PriceReader
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.blankly_cache import drift_to_blankly, read_drift_candles, write_price_cache
 
 
 def price_event(price, symbol, state: blankly.StrategyState):
@@ -44,10 +49,6 @@ def init(symbol, state: blankly.StrategyState):
     )["close"]
 
 
-import pandas as pd
-from datetime import datetime
-
-
 def transform_csv(input_file, output_file):
     """
     Transform CSV from the input format to the target format.
@@ -56,30 +57,8 @@ def transform_csv(input_file, output_file):
         input_file (str): Path to input CSV file
         output_file (str): Path to output CSV file
     """
-    # Read the input CSV
-    df = pd.read_csv(input_file)
-
-    # Create new dataframe with required columns
-    new_df = pd.DataFrame(
-        {
-            "time": df["start"].apply(
-                lambda x: int(x / 1000)
-            ),  # Convert milliseconds to seconds
-            "low": df["fillLow"],  # Using fill values instead of oracle values
-            "high": df["fillHigh"],
-            "open": df["fillOpen"],
-            "close": df["fillClose"],
-            "volume": df[
-                "baseVolume"
-            ],  # Using base volume as it's likely the asset volume
-        }
-    )
-
-    # Reset index to add the numeric index column
-    new_df = new_df.reset_index(drop=True)
-
-    # Save to CSV
-    new_df.to_csv(output_file)
+    # Save to CSV, with the numeric index column
+    drift_to_blankly(read_drift_candles(input_file)).to_csv(output_file)
 
 
 # Example usage:
@@ -93,12 +72,12 @@ if __name__ == "__main__":
     # with open("./price_examples.csv", "w") as file:
     #     file.write(data)
 
-    # stransform_csv("./15.csv", "./15_transformed.csv")
+    # Write the Drift candles straight into blankly's price cache, so the
+    # backtest needs neither an intermediate CSV nor a PriceReader
+    write_price_cache("./15.csv", "BTC", cache_location="./price_caches")
 
     # Run on the keyless exchange, starting at 100k
-    exchange = blankly.KeylessExchange(
-        price_reader=PriceReader("./15_transformed.csv", "BTC-USD")
-    )
+    exchange = blankly.KeylessExchange()
 
     # Use our strategy helper
     strategy = blankly.Strategy(exchange)
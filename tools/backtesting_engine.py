@@ -1,7 +1,17 @@
+import hashlib
+import inspect
+import marshal
+import os
+import pickle
+import sys
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Suppress only the SettingWithCopyWarning
+pd.options.mode.chained_assignment = None
+
 
 # Helper functions for performance metrics
 def calculate_cumulative_return(positions):
@@ -130,7 +140,90 @@ def example_strategy(window_data, positions):
     return None
 
 
-def backtest_strategy(candle_file, strategy_function=example_strategy):
+def candle_fingerprint(candle_file):
+    """Identifies a version of a candle file, or the contents of a frame"""
+    if isinstance(candle_file, pd.DataFrame):
+        return [len(candle_file), int(pd.util.hash_pandas_object(candle_file).sum())]
+    stat = os.stat(candle_file)
+    return [os.path.abspath(candle_file), stat.st_size, stat.st_mtime_ns]
+
+
+def _strategy_fingerprint(strategy):
+    """Name and code hash of a strategy function or callable object.
+
+    Strategies exec'd by the backtesting tool all share one name, so the
+    hash of their code objects is what tells them apart.
+    """
+    name = getattr(strategy, "__qualname__", type(strategy).__qualname__)
+    if hasattr(strategy, "__code__"):
+        code = [strategy.__code__]
+    else:
+        code = [
+            value.__code__
+            for cls in type(strategy).__mro__
+            for value in vars(cls).values()
+            if hasattr(value, "__code__")
+        ]
+    digest = hashlib.sha256(b"".join(marshal.dumps(c) for c in code)).hexdigest()
+    return [f"{getattr(strategy, '__module__', '')}.{name}", digest]
+
+
+def _restorable(strategy):
+    """Whether a later process can unpickle strategy from a checkpoint"""
+    if inspect.isroutine(strategy):
+        # Functions hold no state and are pickled by name only
+        return False
+    module = sys.modules.get(type(strategy).__module__)
+    if getattr(getattr(module, "__spec__", None), "loader", None) is None:
+        # e.g. classes exec'd into strategy_module by the backtesting tool
+        return False
+    try:
+        pickle.loads(pickle.dumps(strategy))
+    except Exception:
+        return False
+    return True
+
+
+def _save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write next to the target and rename, so a crash never leaves half a file
+    with open(f"{path}.part", "wb") as f:
+        pickle.dump(state, f)
+    os.replace(f"{path}.part", path)
+
+
+def _load_checkpoint(path, fingerprint):
+    """State checkpointed at path by the same run, or None"""
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except Exception:
+        # Unreadable, truncated, or refers to code that is no longer importable
+        return None
+    if not isinstance(state, dict) or state.get("fingerprint") != fingerprint:
+        return None
+    return state
+
+
+def _remove_checkpoint(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def backtest_strategy(
+    candle_file,
+    strategy_function=example_strategy,
+    checkpoint_path=None,
+    checkpoint_every=10000,
+):
+    """Walk strategy_function over a growing window of the candles.
+
+    With checkpoint_path, the next bar index, the positions and, for callable
+    objects a later process can unpickle, the strategy itself (so it keeps
+    its state) are saved there every checkpoint_every bars. A later call with
+    the same candle file and strategy code resumes from the checkpoint, which
+    is removed once the backtest completes.
+    """
     # Load candle data with proper timestamp parsing
     candle_data = pd.read_csv(candle_file)
     # Convert Unix timestamp (assuming milliseconds) to datetime
@@ -147,8 +240,19 @@ def backtest_strategy(candle_file, strategy_function=example_strategy):
             "PnL": pd.Series(dtype="float"),
         }
     )
+    first_bar = 1
+    fingerprint = [
+        candle_fingerprint(candle_file),
+        _strategy_fingerprint(strategy_function),
+    ]
+    state = checkpoint_path and _load_checkpoint(checkpoint_path, fingerprint)
+    if state:
+        first_bar, positions = state["next_bar"], state["positions"]
+        if state["strategy"] is not None:
+            strategy_function = state["strategy"]
+
     # walk ahead with a growing window
-    for i in range(1, len(candle_data) + 1):
+    for i in range(first_bar, len(candle_data) + 1):
         # Get the data up to index i (growing window)
         window_data = candle_data.iloc[:i]
 
@@ -178,10 +282,28 @@ def backtest_strategy(candle_file, strategy_function=example_strategy):
                 new_position = pd.DataFrame([position])
                 positions = pd.concat([positions, new_position], ignore_index=True)
 
+        if checkpoint_path and i % checkpoint_every == 0:
+            _save_checkpoint(
+                checkpoint_path,
+                {
+                    "fingerprint": fingerprint,
+                    "next_bar": i + 1,
+                    "positions": positions,
+                    "strategy": (
+                        strategy_function if _restorable(strategy_function) else None
+                    ),
+                },
+            )
+
+    _remove_checkpoint(checkpoint_path)
+    return calculate_metrics(positions), positions
+
+
+def calculate_metrics(positions):
     closed_positions_only = positions[positions["Exit Time"].notna()]
 
     # Calculate metrics
-    metrics = {
+    return {
         "Cumulative Return": calculate_cumulative_return(closed_positions_only),
         "Annualized Return": calculate_annualized_return(closed_positions_only),
         "Sharpe Ratio": calculate_sharpe_ratio(closed_positions_only),
@@ -190,7 +312,230 @@ def backtest_strategy(candle_file, strategy_function=example_strategy):
         "Number of positions": closed_positions_only.shape[0],
     }
 
-    return metrics, positions
+
+def _rsi(series, period):
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+# Indicator functions by name; each takes a price series and its parameters.
+# Moving averages use min_periods=1 to match the mean of a short window slice.
+INDICATORS = {
+    "sma": lambda series, period: series.rolling(period, min_periods=1).mean(),
+    "ema": lambda series, period: series.ewm(span=period, adjust=False).mean(),
+    "rsi": _rsi,
+}
+
+
+class IndicatorCache:
+    """Indicator series over the whole candle file, computed once per key.
+
+    The key is (indicator name, parameters, column), so strategy variants
+    asking for the same indicator share one rolling computation. Values are
+    numpy arrays aligned with the candles; a value at bar i only depends on
+    bars up to i.
+    """
+
+    def __init__(self, candle_data):
+        self.candle_data = candle_data
+        self._series = {}
+        self.computed = 0
+
+    def get(self, name, column="fillOpen", **params):
+        key = (name, tuple(sorted(params.items())), column)
+        if key not in self._series:
+            series = INDICATORS[name](self.candle_data[column], **params)
+            self._series[key] = series.to_numpy(dtype=float)
+            self.computed += 1
+        return self._series[key]
+
+
+class MovingAverageCross:
+    """example_strategy with configurable moving averages, for batch backtests.
+
+    Batch strategies declare their indicators in prepare(indicators) and
+    return the position size signalled at bar i from signal(i): 1 for long,
+    -1 for short, 0 for nothing.
+    """
+
+    def __init__(self, fast_ma=10, slow_ma=30, column="fillOpen"):
+        self.fast_ma = fast_ma
+        self.slow_ma = slow_ma
+        self.column = column
+
+    def prepare(self, indicators):
+        self.fast = indicators.get("sma", self.column, period=self.fast_ma)
+        self.slow = indicators.get("sma", self.column, period=self.slow_ma)
+
+    def signal(self, i):
+        if i < self.slow_ma - 1:
+            return 0
+        fast_prev, slow_prev = self.fast[i - 1], self.slow[i - 1]
+        if fast_prev <= slow_prev and self.fast[i] > self.slow[i]:
+            return 1
+        if fast_prev >= slow_prev and self.fast[i] < self.slow[i]:
+            return -1
+        return 0
+
+    def __repr__(self):
+        return f"MovingAverageCross(fast_ma={self.fast_ma}, slow_ma={self.slow_ma})"
+
+
+class RsiThreshold:
+    """Long below `oversold` RSI, short above `overbought`, for batch backtests"""
+
+    def __init__(self, period=14, overbought=70, oversold=30, column="fillOpen"):
+        self.period = period
+        self.overbought = overbought
+        self.oversold = oversold
+        self.column = column
+
+    def prepare(self, indicators):
+        self.rsi = indicators.get("rsi", self.column, period=self.period)
+
+    def signal(self, i):
+        if i < self.period - 1:
+            return 0
+        if self.rsi[i] < self.oversold:
+            return 1
+        if self.rsi[i] > self.overbought:
+            return -1
+        return 0
+
+    def __repr__(self):
+        return (
+            f"RsiThreshold(period={self.period}, overbought={self.overbought}, "
+            f"oversold={self.oversold})"
+        )
+
+
+def _apply_signal(ledger, size, time, price):
+    """Close the last open position against size, or open a new one.
+
+    Same bookkeeping as backtest_strategy, on a list of position dicts.
+    """
+    for position in reversed(ledger):
+        if position["Exit Time"] is None and position["Size"] * size < 0:
+            position["Exit Time"] = time
+            position["Exit Price"] = price
+            position["PnL"] = (price - position["Entry Price"]) * position["Size"]
+            return
+    ledger.append(
+        {
+            "Size": size,
+            "Entry Time": time,
+            "Entry Price": price,
+            "Exit Time": None,
+            "Exit Price": np.nan,
+            "PnL": np.nan,
+        }
+    )
+
+
+def _ledger_frame(ledger):
+    positions = pd.DataFrame(
+        ledger,
+        columns=["Size", "Entry Time", "Entry Price", "Exit Time", "Exit Price", "PnL"],
+    )
+    positions["Size"] = positions["Size"].astype(float)
+    for column in ("Entry Time", "Exit Time"):
+        positions[column] = pd.to_datetime(positions[column])
+    return positions
+
+
+def _batch_metrics(positions):
+    try:
+        return calculate_metrics(positions)
+    except ZeroDivisionError:
+        # No closed positions, or all of them within a day
+        metrics = dict.fromkeys(
+            [
+                "Cumulative Return",
+                "Annualized Return",
+                "Sharpe Ratio",
+                "Sortino Ratio",
+                "Win Rate",
+            ],
+            np.nan,
+        )
+        metrics["Number of positions"] = int(positions["Exit Time"].notna().sum())
+        return metrics
+
+
+def load_candles(candle_file):
+    """Read a Drift candle file with start converted to datetimes"""
+    candle_data = pd.read_csv(candle_file)
+    candle_data["start"] = pd.to_datetime(candle_data["start"], unit="ms")
+    return candle_data
+
+
+def backtest_strategies(
+    candle_file,
+    strategies,
+    price_column="fillOpen",
+    max_bars=None,
+    checkpoint_path=None,
+    checkpoint_every=10000,
+):
+    """Backtest several batch strategies on one candle file in a single pass.
+
+    strategies are objects like MovingAverageCross and RsiThreshold. Their
+    indicators come from one IndicatorCache, so variants that share an
+    indicator compute it once, and every bar is evaluated for all variants
+    before moving on. Trades fill at price_column of the signal bar.
+    candle_file may also be a frame from load_candles; with max_bars only
+    the first max_bars candles are used.
+
+    checkpoint_path and checkpoint_every work as in backtest_strategy, saving
+    the bar index and the ledgers. Batch strategies are not saved: their
+    signals only depend on their parameters and the indicators.
+
+    Returns a (metrics, positions) pair per strategy, as backtest_strategy.
+    """
+    if isinstance(candle_file, pd.DataFrame):
+        candle_data = candle_file
+    else:
+        candle_data = load_candles(candle_file)
+    if max_bars is not None:
+        candle_data = candle_data.iloc[:max_bars]
+
+    indicators = IndicatorCache(candle_data)
+    for strategy in strategies:
+        strategy.prepare(indicators)
+
+    times = candle_data["start"].to_list()
+    prices = candle_data[price_column].to_numpy(dtype=float)
+    ledgers = [[] for _ in strategies]
+    first_bar = 0
+    fingerprint = [
+        candle_fingerprint(candle_file),
+        max_bars,
+        price_column,
+        [repr(s) for s in strategies],
+    ]
+    state = checkpoint_path and _load_checkpoint(checkpoint_path, fingerprint)
+    if state:
+        first_bar, ledgers = state["next_bar"], state["ledgers"]
+
+    for i in range(first_bar, len(candle_data)):
+        for strategy, ledger in zip(strategies, ledgers):
+            size = strategy.signal(i)
+            if size:
+                _apply_signal(ledger, size, times[i], prices[i])
+        if checkpoint_path and (i + 1) % checkpoint_every == 0:
+            _save_checkpoint(
+                checkpoint_path,
+                {"fingerprint": fingerprint, "next_bar": i + 1, "ledgers": ledgers},
+            )
+    _remove_checkpoint(checkpoint_path)
+
+    results = []
+    for ledger in ledgers:
+        positions = _ledger_frame(ledger)
+        results.append((_batch_metrics(positions), positions))
+    return results
 
 
 # # Example usage
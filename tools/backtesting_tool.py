@@ -1,76 +1,237 @@
 from langchain_core.tools import BaseTool
-from typing import Dict, Optional, Union
+from typing import Dict, Optional, Type, Union
 import pandas as pd
+import numpy as np
+import hashlib
+import json
 import importlib.util
 import sys
 import os
 from datetime import datetime
 import asyncio
-from pydantic import Field
+from pydantic import BaseModel, Field
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from tools.backtesting_engine import backtest_strategy
+from tools.tool_specs import (
+    BACKTEST_RESULT_DESCRIPTION,
+    BACKTESTING_DESCRIPTION,
+    BacktestingInput,
+    BacktestResultInput,
+)
+
+_backtest_pool = None
+
+# Full positions of every backtest, as <result id>.csv
+RESULTS_DIR = os.getenv("BACKTEST_RESULTS_DIR", "results")
+
+METRIC_KEYS = {
+    "Cumulative Return": "cumulative_return_pct",
+    "Annualized Return": "annualized_return",
+    "Sharpe Ratio": "sharpe_ratio",
+    "Sortino Ratio": "sortino_ratio",
+    "Win Rate": "win_rate",
+}
+
+
+def get_backtest_pool() -> ProcessPoolExecutor:
+    """Worker pool shared by every backtest, sized by BACKTEST_WORKERS"""
+    global _backtest_pool
+    if _backtest_pool is None:
+        workers = int(os.getenv("BACKTEST_WORKERS", os.cpu_count() or 1))
+        _backtest_pool = ProcessPoolExecutor(max_workers=workers)
+    return _backtest_pool
+
+
+def load_strategy(strategy_code: str) -> callable:
+    """Dynamically load strategy function from string code."""
+    try:
+        # Create a temporary module
+        spec = importlib.util.spec_from_loader("strategy_module", loader=None)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["strategy_module"] = module
+
+        # Execute the strategy code in the module's context
+        exec(strategy_code, module.__dict__)
+
+        # Return the strategy function
+        return module.strategy
+    except Exception as e:
+        raise ValueError(f"Error loading strategy: {str(e)}")
+
+
+def _round(value, digits=6):
+    """Number rounded to `digits` significant digits; NaN and infinities become None"""
+    value = float(value)
+    return float(f"{value:.{digits}g}") if np.isfinite(value) else None
+
+
+def _trade_record(row) -> Dict[str, Union[str, float, None]]:
+    return {
+        "size": _round(row["Size"]),
+        "entry_time": str(row["Entry Time"]),
+        "entry_price": _round(row["Entry Price"]),
+        "exit_time": str(row["Exit Time"]) if pd.notna(row["Exit Time"]) else None,
+        "exit_price": _round(row["Exit Price"]),
+        "pnl": _round(row["PnL"]),
+    }
+
+
+def result_id_for(strategy_code: str, data_file: str) -> str:
+    """Stable id of a backtest of strategy_code on the current data_file"""
+    digest = hashlib.sha256(strategy_code.encode())
+    digest.update(data_file.encode())
+    digest.update(str(os.path.getmtime(data_file)).encode())
+    return digest.hexdigest()[:12]
+
+
+def results_path(result_id: str, results_dir: str = RESULTS_DIR) -> str:
+    return os.path.join(results_dir, f"{result_id}.csv")
+
+
+def summarize_backtest(
+    metrics: Dict,
+    positions: pd.DataFrame,
+    result_id: str,
+    points=50,
+    top_n=3,
+    results_dir: str = RESULTS_DIR,
+) -> Dict:
+    """Compact summary of a backtest with a fixed set of keys.
+
+    The equity curve is the cumulative PnL of closed positions by exit time,
+    downsampled to at most `points` points; best and worst trades are the
+    top_n closed positions by PnL.
+    """
+    closed = positions[positions["Exit Time"].notna()].sort_values("Exit Time")
+    equity = closed["PnL"].cumsum()
+    if len(closed) > points:
+        keep = np.unique(np.linspace(0, len(closed) - 1, points).round().astype(int))
+        closed_points, equity = closed.iloc[keep], equity.iloc[keep]
+    else:
+        closed_points = closed
+    by_pnl = closed.sort_values("PnL", ascending=False)
+
+    return {
+        "result_id": result_id,
+        "metrics": {key: _round(metrics[name]) for name, key in METRIC_KEYS.items()},
+        "trades": int(len(closed)),
+        "open_positions": int(len(positions) - len(closed)),
+        "equity_curve": [
+            [str(t), _round(v)] for t, v in zip(closed_points["Exit Time"], equity)
+        ],
+        "best_trades": [_trade_record(r) for _, r in by_pnl.head(top_n).iterrows()],
+        "worst_trades": [
+            _trade_record(r) for _, r in by_pnl.tail(top_n).iloc[::-1].iterrows()
+        ],
+        "positions_file": results_path(result_id, results_dir),
+    }
+
+
+def run_backtest(
+    strategy_code: str, data_file: str, results_dir: str = RESULTS_DIR
+) -> str:
+    """Load and backtest a strategy; runs in the worker pool.
+
+    Returns the JSON summary of summarize_backtest and stores the full
+    positions under results_dir for BacktestResultTool.
+    """
+    try:
+        if not strategy_code or not data_file:
+            return "Error: Both strategy_code and data_file are required"
+
+        # Load the strategy function
+        strategy_fn = load_strategy(strategy_code)
+
+        metrics, positions = backtest_strategy(data_file, strategy_fn)
+
+        result_id = result_id_for(strategy_code, data_file)
+        os.makedirs(results_dir, exist_ok=True)
+        positions.to_csv(results_path(result_id, results_dir), index=False)
+        return json.dumps(
+            summarize_backtest(metrics, positions, result_id, results_dir=results_dir)
+        )
+
+    except Exception as e:
+        return f"Error running backtest: {str(e)}"
 
 
 class BacktestingTool(BaseTool):
     name: str = "BacktestingTool"
-    description: str = """Use this tool to backtest a trading strategy on historical data.
-    Inputs are the strategy code and the historical candle data file:
-    - 'strategy_code': Python code of the strategy function as string
-    - 'data_file': Path to the CSV file with historical data
-    The strategy function should follow this template:
-    def strategy(window_data: pd.DataFrame, positions: pd.DataFrame) -> Optional[Dict[str, Union[int, float, datetime]]]
-    """
+    description: str = BACKTESTING_DESCRIPTION
+    args_schema: Type[BaseModel] = BacktestingInput
 
     def _load_strategy(self, strategy_code: str) -> callable:
         """Dynamically load strategy function from string code."""
-        try:
-            # Create a temporary module
-            spec = importlib.util.spec_from_loader("strategy_module", loader=None)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules["strategy_module"] = module
-
-            # Execute the strategy code in the module's context
-            exec(strategy_code, module.__dict__)
-
-            # Return the strategy function
-            return module.strategy
-        except Exception as e:
-            raise ValueError(f"Error loading strategy: {str(e)}")
+        return load_strategy(strategy_code)
 
     # strategy_code: str = Field(..., description="Python code of the strategy function")
     # data_file: str = Field(..., description="Path to the historical data CSV file")
 
-    def __init__(self):
+    results_dir: str = RESULTS_DIR
+
+    def __init__(self, results_dir: str = RESULTS_DIR):
         # super().__init__(strategy_code=strategy_code, data_file=data_file)
         super().__init__()
+        self.results_dir = results_dir
 
     def _run(self, strategy_code: str, data_file: dict) -> str:
         """Run backtest using the stored strategy code and data file.
 
         Returns:
-            str: JSON string with backtest results
+            str: JSON string with the backtest summary
         """
-        try:
-            # strategy_code = input_dict.get("strategy_code")
-            # data_file = input_dict.get("data_file")
-
-            if not strategy_code or not data_file:
-                return "Error: Both strategy_code and data_file are required"
-
-            # Load the strategy function
-            strategy_fn = self._load_strategy(strategy_code)
-
-            metrics, positions = backtest_strategy(data_file, strategy_fn)
-            return str(metrics)
+        return run_backtest(strategy_code, data_file, self.results_dir)
 
+    async def _arun(self, strategy_code: str, data_file: str) -> str:
+        """Async version of _run, executed on the shared worker pool"""
+        global _backtest_pool
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                get_backtest_pool(),
+                run_backtest,
+                strategy_code,
+                data_file,
+                self.results_dir,
+            )
+        except BrokenProcessPool:
+            # A strategy took its worker down; start a fresh pool next time
+            _backtest_pool = None
+            return "Error running backtest: the backtest worker crashed"
+
+
+class BacktestResultTool(BaseTool):
+    name: str = "BacktestResultTool"
+    description: str = BACKTEST_RESULT_DESCRIPTION
+    args_schema: Type[BaseModel] = BacktestResultInput
+    results_dir: str = RESULTS_DIR
+
+    def _run(self, result_id: str, offset: int = 0, limit: int = 20) -> str:
+        """Read a page of the stored positions of a backtest"""
+        path = results_path(os.path.basename(result_id.strip()), self.results_dir)
+        if not os.path.exists(path):
+            return f"Error: No stored backtest result with id {result_id}"
+        try:
+            positions = pd.read_csv(path)
+            page = positions.iloc[offset : offset + limit]
+            return json.dumps(
+                {
+                    "result_id": result_id,
+                    "positions": len(positions),
+                    "offset": offset,
+                    "trades": [_trade_record(row) for _, row in page.iterrows()],
+                }
+            )
         except Exception as e:
-            return f"Error running backtest: {str(e)}"
+            return f"Error reading backtest result: {str(e)}"
 
-    async def _arun(self, strategy_code: str, data_file: str) -> str:
+    async def _arun(self, result_id: str, offset: int = 0, limit: int = 20) -> str:
         """Async version of _run"""
-        return self._run(strategy_code, data_file)
+        return await asyncio.to_thread(self._run, result_id, offset, limit)
 
 
 # Example usage:
@@ -0,0 +1,101 @@
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_LOCATION = "./price_caches"
+
+# Drift candle columns and the blankly price columns they become; fill prices
+# rather than oracle prices, base volume as the asset volume
+DRIFT_TO_BLANKLY = {
+    "fillLow": "low",
+    "fillHigh": "high",
+    "fillOpen": "open",
+    "fillClose": "close",
+    "baseVolume": "volume",
+}
+
+
+def drift_to_blankly(candles: pd.DataFrame) -> pd.DataFrame:
+    """Convert Drift candles to blankly's time/low/high/open/close/volume layout.
+
+    Millisecond starts become whole seconds with integer division over the
+    whole column.
+    """
+    prices = pd.DataFrame({"time": candles["start"].to_numpy(dtype=np.int64) // 1000})
+    for drift_column, blankly_column in DRIFT_TO_BLANKLY.items():
+        prices[blankly_column] = candles[drift_column].to_numpy()
+    return prices
+
+
+def read_drift_candles(candle_file: str) -> pd.DataFrame:
+    """Read only the columns the conversion needs from a Drift candle file"""
+    return pd.read_csv(
+        candle_file,
+        usecols=["start", *DRIFT_TO_BLANKLY],
+        dtype={"start": np.int64, **{c: np.float64 for c in DRIFT_TO_BLANKLY}},
+    )
+
+
+def blankly_symbol(symbol: str, quote: str = "USD") -> str:
+    """Blankly's BASE-QUOTE form of a Drift symbol, e.g. SOL -> SOL-USD"""
+    return symbol if "-" in symbol else f"{symbol}-{quote}"
+
+
+def price_cache_name(
+    symbol: str,
+    start: int,
+    end: int,
+    resolution: int,
+    exchange: str = "keyless",
+    sandbox: bool = True,
+) -> str:
+    """File name blankly's backtest controller looks for in its cache location"""
+    return f"{exchange},{sandbox},{symbol},{start},{end},{resolution}.csv"
+
+
+def write_price_cache(
+    candles,
+    symbol: str,
+    resolution: Optional[int] = None,
+    cache_location: str = DEFAULT_CACHE_LOCATION,
+    exchange: str = "keyless",
+    sandbox: bool = True,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> str:
+    """Write Drift candles straight into blankly's price cache.
+
+    candles is a Drift candle file or an already loaded frame. The cache
+    covers [start, end), by default [first start, last start + resolution),
+    and has the "Unnamed: 0" index column, like the files blankly writes
+    itself. resolution is in seconds and inferred from the candle spacing
+    when not given.
+
+    Returns the path of the cache file.
+    """
+    if isinstance(candles, str):
+        candles = read_drift_candles(candles)
+    prices = drift_to_blankly(candles)
+    if prices.empty:
+        raise ValueError("No candles to cache")
+
+    times = prices["time"].to_numpy()
+    if resolution is None:
+        if len(times) < 2:
+            raise ValueError("resolution is required for a single candle")
+        resolution = int(np.median(np.diff(times)))
+
+    name = price_cache_name(
+        blankly_symbol(symbol),
+        int(times[0]) if start is None else start,
+        int(times[-1]) + resolution if end is None else end,
+        resolution,
+        exchange=exchange,
+        sandbox=sandbox,
+    )
+    os.makedirs(cache_location, exist_ok=True)
+    path = os.path.join(cache_location, name)
+    prices.to_csv(path, index_label="Unnamed: 0")
+    return path
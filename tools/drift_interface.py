@@ -1,41 +1,223 @@
 import asyncio
+import contextvars
 import sys
 import logging
-
-from driftpy.drift_client import DriftClient
-from solana.rpc.async_api import AsyncClient
 import os
-from anchorpy import Wallet
-from driftpy.keypair import load_keypair
+import time
+from contextlib import nullcontext
+
 from driftpy.types import *
 from driftpy.constants.numeric_constants import BASE_PRECISION, PRICE_PRECISION
 
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.drift_constants import drift_perp_markets
+from tools.drift_prefetch import OrderStatePrefetcher
+from tools.latency import order_latency
+
+# Connection settings, read when the client is first built.
+# Override with configure() or the DRIFT_RPC_URL / DRIFT_KEYPAIR_PATH variables.
+# rpc_url may list several comma separated endpoints to fail over between and
+# defaults to SOLANA_RPC_URLS, see tools.solana_rpc.
+# Every perp market the tools can trade is subscribed, the client can only
+# build orders for markets it is subscribed to.
+settings = {
+    "rpc_url": os.getenv("DRIFT_RPC_URL"),
+    "keypair_path": os.getenv("DRIFT_KEYPAIR_PATH", "./keypair.json"),
+    "perp_market_indexes": [market["marketIndex"] for market in drift_perp_markets],
+    "spot_market_indexes": [0],
+}
+
+
+def build_drift_client():
+    """Build a DriftClient from the configured RPC URL and keypair"""
+    # Imported here so importing this module never loads the Solana client stack
+    from anchorpy import Wallet
+    from driftpy.drift_client import DriftClient
+    from driftpy.keypair import load_keypair
+    from tools.solana_rpc import ResilientAsyncClient, rpc_urls
+
+    keypair = load_keypair(os.path.expanduser(settings["keypair_path"]))
+    return DriftClient(
+        ResilientAsyncClient(rpc_urls(settings["rpc_url"]), timeout=100000),
+        Wallet(keypair),
+        "mainnet",
+        perp_market_indexes=settings["perp_market_indexes"],
+        spot_market_indexes=settings["spot_market_indexes"],
+    )
+
+
+class DriftClientManager:
+    """Keeps one subscribed DriftClient alive and shares it across orders.
+
+    The client subscribes once and its account and market subscriptions stay
+    warm between orders, so placing an order only costs signing and sending.
+    When an operation fails the client is torn down, rebuilt and resubscribed
+    so the next order runs on a healthy connection.
+
+    With prefetch, an OrderStatePrefetcher keeps a recent blockhash cached
+    next to the client. The client's tx_sender is wrapped in a TimedTxSender,
+    which signs with the prefetched blockhash.
+    """
+
+    def __init__(
+        self,
+        client_factory=build_drift_client,
+        client=None,
+        max_retries=1,
+        prefetch=True,
+    ):
+        self.client_factory = client_factory
+        self.client = client
+        self.max_retries = max_retries
+        self.prefetch = prefetch
+        self.prefetcher = None
+        self.subscribed = False
+        self._lock = None
+
+    def _get_lock(self):
+        # Created lazily so the lock belongs to the loop that uses the client
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def ensure_subscribed(self):
+        """Subscribe the client unless it is already subscribed"""
+        if self.subscribed:
+            return self.client
+        async with self._get_lock():
+            if not self.subscribed:
+                if self.client is None:
+                    self.client = self.client_factory()
+                await self._subscribe()
+        return self.client
+
+    async def close(self):
+        """Tear down all subscriptions and close the RPC connection"""
+        async with self._get_lock():
+            await self._teardown()
+
+    async def reconnect(self):
+        """Replace the client with a freshly built and subscribed one"""
+        async with self._get_lock():
+            await self._teardown()
+            self.client = self.client_factory()
+            await self._subscribe()
+        return self.client
+
+    async def _subscribe(self):
+        await self.client.subscribe()
+        self.subscribed = True
+        if not isinstance(self.client.tx_sender, TimedTxSender):
+            self.client.tx_sender = TimedTxSender(
+                self.client.tx_sender, self.cached_blockhash
+            )
+        if self.prefetch:
+            self.prefetcher = OrderStatePrefetcher(self.client)
+            try:
+                await self.prefetcher.start()
+            except Exception as e:
+                # Orders fall back to fetching their own blockhash
+                logging.error(f"Error prefetching order state: {e}")
+
+    def cached_blockhash(self):
+        """Prefetched blockhash, or None if it is missing or stale"""
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.get_blockhash()
+
+    async def _teardown(self):
+        if not self.subscribed:
+            return
+        self.subscribed = False
+        if self.prefetcher is not None:
+            await self.prefetcher.stop()
+            self.prefetcher = None
+        try:
+            await self.client.account_subscriber.unsubscribe()
+            await self.client.unsubscribe()
+            await self.client.connection.close()
+        except Exception as e:
+            logging.error(f"Error shutting down drift client: {e}")
 
-url = "https://api.mainnet-beta.solana.com"
-connection = AsyncClient(url, timeout=100000)
+    async def run(self, operation, retry=False):
+        """Run operation(client) on the subscribed client, reconnecting on failure.
 
-keypair_file = os.path.expanduser("./keypair.json")
-keypair = load_keypair(keypair_file)
-wallet = Wallet(keypair)
-drift_client = DriftClient(
-    connection, wallet, "mainnet", perp_market_indexes=[0], spot_market_indexes=[0]
-)
+        Only idempotent operations should set retry: a failed send may still
+        have landed, so orders reconnect for the next call but are not resent.
+        """
+        client = await self.ensure_subscribed()
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            try:
+                return await operation(client)
+            except Exception as e:
+                logging.error(f"Drift client operation failed, reconnecting: {e}")
+                try:
+                    client = await self.reconnect()
+                    reconnected = True
+                except Exception as reconnect_error:
+                    logging.error(f"Error reconnecting drift client: {reconnect_error}")
+                    reconnected = False
+                # The operation's error is the one callers need to see
+                if attempt == attempts - 1 or not reconnected:
+                    raise
+
+
+_client_manager = None
+
+
+def configure(rpc_url=None, keypair_path=None, client_factory=None, **overrides):
+    """Change connection settings before the client is first used.
+
+    A client that is already built keeps its settings until shutdown().
+    """
+    if rpc_url is not None:
+        settings["rpc_url"] = rpc_url
+    if keypair_path is not None:
+        settings["keypair_path"] = keypair_path
+    settings.update(overrides)
+    if client_factory is not None:
+        get_client_manager().client_factory = client_factory
+
+
+def get_client_manager():
+    """Return the shared DriftClientManager, creating it on first use"""
+    global _client_manager
+    if _client_manager is None:
+        _client_manager = DriftClientManager()
+    return _client_manager
+
+
+async def get_drift_client():
+    """Return the shared, subscribed DriftClient"""
+    return await get_client_manager().ensure_subscribed()
+
+
+def build_order_params(client, amount, direction, market_index):
+    """Build market OrderParams for amount of the perp market"""
+    return OrderParams(
+        order_type=OrderType.Market(),
+        market_type=MarketType.Perp(),
+        base_asset_amount=client.convert_to_perp_precision(amount),
+        market_index=market_index,
+        direction=direction,
+    )
 
 
 async def init():
-    await drift_client.subscribe()
+    await get_client_manager().ensure_subscribed()
 
 
 async def shutdown():
-    await drift_client.account_subscriber.unsubscribe()
-    await drift_client.unsubscribe()
-    await drift_client.connection.close()
+    if _client_manager is not None:
+        await _client_manager.close()
+        # Rebuild from current settings next time
+        _client_manager.client = None
 
 
 async def create_subaccount():
+    drift_client = await get_drift_client()
     tx_sig = await drift_client.initialize_user(sub_account_id=0, name="toly")
     logging.info(tx_sig)
 
@@ -45,6 +227,7 @@ async def deposit(amount, spot_market_index=0, sub_account_id=0):
     # https://github.com/drift-labs/protocol-v2/blob/master/sdk/src/constants/spotMarkets.ts
     # https://github.com/drift-labs/protocol-v2/blob/master/sdk/src/constants/perpMarkets.ts
 
+    drift_client = await get_drift_client()
     drift_client.switch_active_user(sub_account_id=sub_account_id)
     amount = drift_client.convert_to_spot_precision(amount, spot_market_index)  # $100
     logging.info(f"convert_to_spot_precision: {amount} ")
@@ -55,23 +238,204 @@ async def deposit(amount, spot_market_index=0, sub_account_id=0):
     logging.info(tx_sig)
 
 
+# Recorder of the order being sent in the current task; sends outside
+# place_order (deposits, batches) leave it unset and are not timed
+order_recorder = contextvars.ContextVar("order_recorder", default=None)
+
+
+def _span(stage):
+    recorder = order_recorder.get()
+    return recorder.span(stage) if recorder is not None else nullcontext()
+
+
+class _Overlay:
+    """target with some attributes replaced, to run its methods against them"""
+
+    def __init__(self, target, **overrides):
+        self.__dict__.update(overrides)
+        self._target = target
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+class TimedTxSender:
+    """Wraps a DriftClient's tx_sender to time the stages of sending.
+
+    DriftClient.send_ixs still builds every transaction and the wrapped
+    sender's own get_versioned_tx and send still run, so compute budget, tx
+    sequencing, lookup tables and the sender's TxOpts all apply as usual.
+    The blockhash fetch, signing, sending and confirmation are recorded on
+    order_recorder. A blockhash from blockhash_source, e.g. the prefetcher,
+    skips the fetch; otherwise the wrapped sender fetches one at its own
+    blockhash commitment.
+    """
+
+    def __init__(self, tx_sender, blockhash_source=None):
+        self.tx_sender = tx_sender
+        self.blockhash_source = blockhash_source
+
+    def __getattr__(self, name):
+        return getattr(self.tx_sender, name)
+
+    async def fetch_latest_blockhash(self):
+        blockhash = self.blockhash_source() if self.blockhash_source else None
+        if blockhash is not None:
+            return blockhash
+        with _span("blockhash"):
+            return await self.tx_sender.fetch_latest_blockhash()
+
+    async def get_blockhash(self):
+        return await self.fetch_latest_blockhash()
+
+    async def get_versioned_tx(
+        self, ixs, payer, lookup_tables, additional_signers=None
+    ):
+        if not hasattr(self.tx_sender, "fetch_latest_blockhash"):
+            with _span("sign"):
+                return await self.tx_sender.get_versioned_tx(
+                    ixs, payer, lookup_tables, additional_signers
+                )
+
+        blockhash = await self.fetch_latest_blockhash()
+
+        async def fetched_blockhash():
+            return blockhash
+
+        # The wrapped sender compiles and signs on the blockhash fetched above
+        sender = _Overlay(
+            self.tx_sender,
+            fetch_latest_blockhash=fetched_blockhash,
+            get_blockhash=fetched_blockhash,
+        )
+        with _span("sign"):
+            return await type(self.tx_sender).get_versioned_tx(
+                sender, ixs, payer, lookup_tables, additional_signers
+            )
+
+    async def send(self, tx):
+        recorder = order_recorder.get()
+        connection = getattr(self.tx_sender, "connection", None)
+        if recorder is None or connection is None:
+            return await self.tx_sender.send(tx)
+
+        start = time.perf_counter()
+        sent_at = []
+
+        async def confirm_transaction(*args, **kwargs):
+            # The transaction is out, the rest of send waits on confirmation
+            sent_at.append(time.perf_counter())
+            with recorder.span("confirm"):
+                return await connection.confirm_transaction(*args, **kwargs)
+
+        sender = _Overlay(
+            self.tx_sender,
+            connection=_Overlay(connection, confirm_transaction=confirm_transaction),
+        )
+        try:
+            return await type(self.tx_sender).send(sender, tx)
+        finally:
+            sent = sent_at[0] if sent_at else time.perf_counter()
+            recorder.record("send", sent - start)
+
+
 async def place_order(
-    amount, direction=PositionDirection.Long(), market_index=0, sub_account_id=0
+    amount,
+    direction=PositionDirection.Long(),
+    market_index=0,
+    sub_account_id=0,
+    recorder=order_latency,
 ):
-    await drift_client.subscribe()
-    drift_client.switch_active_user(sub_account_id=sub_account_id)
+    manager = get_client_manager()
 
-    order_params = OrderParams(
-        order_type=OrderType.Market(),
-        base_asset_amount=drift_client.convert_to_perp_precision(amount),
-        market_index=market_index,
-        direction=direction,
-    )
-    tx_sig = await drift_client.place_perp_order(order_params)
+    async def _place(client):
+        client.switch_active_user(sub_account_id=sub_account_id)
+        with recorder.span("precision"):
+            order_params = build_order_params(client, amount, direction, market_index)
+        with recorder.span("instruction"):
+            ix = client.get_place_perp_order_ix(order_params)
+
+        # What DriftClient.place_perp_order does, with the send stages timed
+        token = order_recorder.set(recorder)
+        try:
+            tx_sig_and_slot = await client.send_ixs([ix])
+        finally:
+            order_recorder.reset(token)
+        client.last_perp_market_seen_cache[market_index] = tx_sig_and_slot.slot
+        return tx_sig_and_slot.tx_sig
+
+    with recorder.span("place_order"):
+        with recorder.span("subscribe"):
+            await manager.ensure_subscribed()
+        tx_sig = await manager.run(_place)
     logging.info(tx_sig)
+    return tx_sig
+
+
+# Orders packed into one place_orders instruction. Each order adds its market
+# and oracle accounts, so larger batches overflow the 1232 byte transaction limit.
+MAX_ORDERS_PER_TX = 4
+
+
+async def place_orders_batch(
+    orders, sub_account_id=0, max_orders_per_tx=MAX_ORDERS_PER_TX
+):
+    """Place several market orders in as few transactions as possible.
+
+    orders is a list of dicts with 'amount', 'direction' (PositionDirection)
+    and 'market_index'. Orders are packed max_orders_per_tx to a transaction
+    and all transactions are sent concurrently.
+
+    Returns one dict per order, in input order, with its 'signature' and
+    'status' ('submitted' or 'failed', with 'error' set on failure).
+    """
+    manager = get_client_manager()
+    client = await manager.ensure_subscribed()
+    client.switch_active_user(sub_account_id=sub_account_id)
+
+    chunks = [
+        orders[i : i + max_orders_per_tx]
+        for i in range(0, len(orders), max_orders_per_tx)
+    ]
+
+    async def _send(chunk):
+        order_params = [
+            build_order_params(
+                client, order["amount"], order["direction"], order["market_index"]
+            )
+            for order in chunk
+        ]
+        return await client.place_orders(order_params)
+
+    tx_sigs = await asyncio.gather(
+        *[_send(chunk) for chunk in chunks], return_exceptions=True
+    )
+
+    results = []
+    failed = False
+    for chunk, tx_sig in zip(chunks, tx_sigs):
+        for order in chunk:
+            result = dict(order, signature=None, status="submitted")
+            if isinstance(tx_sig, Exception):
+                failed = True
+                result.update(status="failed", error=str(tx_sig))
+            else:
+                result["signature"] = str(tx_sig)
+            results.append(result)
+        logging.info(tx_sig)
+
+    if failed:
+        # Failed sends are not retried, but the next call gets a fresh client.
+        # Other transactions may have landed, so their results are always returned.
+        try:
+            await manager.reconnect()
+        except Exception as e:
+            logging.error(f"Error reconnecting drift client: {e}")
+    return results
 
 
 async def main(sub_account_id=0):
+    drift_client = await get_drift_client()
     drift_client.switch_active_user(sub_account_id=sub_account_id)
     await drift_client.account_subscriber.subscribe()
 
@@ -87,14 +451,17 @@ async def main(sub_account_id=0):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
     loop = asyncio.get_event_loop()
     try:
         # Run the main function
         loop.run_until_complete(init())
         # exit_code = loop.run_until_complete(main())
-        exit_code = loop.run_until_complete(place_order(0.1, PositionDirection.Long()))
+        loop.run_until_complete(place_order(0.1, PositionDirection.Long()))
         loop.run_until_complete(shutdown())
-        sys.exit(exit_code or 0)
+        sys.exit(0)
     except Exception as e:
         logging.error(f"Failed to run main loop: {e}", exc_info=True)
         sys.exit(1)
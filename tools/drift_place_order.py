@@ -1,26 +1,29 @@
 from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+from typing import Dict, List, Type, Union
 import json
-import asyncio
 import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from driftpy.types import PositionDirection, OrderParams, OrderType
-from tools.drift_interface import place_order, init, shutdown
+from tools.drift_interface import place_order, place_orders_batch
+from tools.event_loop import run_sync, run_in_background
+from tools.latency import order_latency
 from tools.drift_constants import drift_perp_markets_dict
+from tools.tool_specs import (
+    DRIFT_BATCH_ORDER_DESCRIPTION,
+    DRIFT_ORDER_DESCRIPTION,
+    DriftBatchOrderInput,
+    DriftOrderInput,
+)
 
 
 class DriftOrderTool(BaseTool):
     name: str = "DriftOrderTool"
-    description: str = """Use this tool to place orders on Drift Exchange.
-    Input should be a JSON string containing:
-    - 'amount': float (amount to trade)
-    - 'direction': string ('long' or 'short')
-    - 'symbol': symbol/ticker to trade (e.g. SOL)
-    Example: amount 0.1, direction: "long", symbol: ETH
-    This tool returns the transaction signature on successful execution.
-    """
+    description: str = DRIFT_ORDER_DESCRIPTION
+    args_schema: Type[BaseModel] = DriftOrderInput
 
     def _run(self, amount: float, direction: str, symbol: str) -> str:
         """Place an order on Drift Exchange."""
@@ -39,10 +42,11 @@ class DriftOrderTool(BaseTool):
                 else PositionDirection.Short()
             )
 
-            # Run the order placement
-            tx_sig = asyncio.run(
-                place_order(amount, direction, market_index, sub_account_id)
-            )
+            # Run the order placement on the shared loop that owns the client
+            with order_latency.span("tool"):
+                tx_sig = run_sync(
+                    place_order(amount, direction, market_index, sub_account_id)
+                )
 
             return f"Order placed successfully. Transaction signature: {tx_sig}"
 
@@ -67,9 +71,11 @@ class DriftOrderTool(BaseTool):
                 else PositionDirection.Short()
             )
 
-            await init()
-            tx_sig = await place_order(amount, direction, market_index, sub_account_id)
-            await shutdown()
+            # The shared client stays subscribed between orders on its own loop
+            with order_latency.span("tool"):
+                tx_sig = await run_in_background(
+                    place_order(amount, direction, market_index, sub_account_id)
+                )
 
             return f"Order placed successfully. Transaction signature: {tx_sig}"
 
@@ -80,6 +86,66 @@ class DriftOrderTool(BaseTool):
             return f"Error placing order: {str(e)}"
 
 
+class DriftBatchOrderTool(BaseTool):
+    name: str = "DriftBatchOrderTool"
+    description: str = DRIFT_BATCH_ORDER_DESCRIPTION
+    args_schema: Type[BaseModel] = DriftBatchOrderInput
+
+    def _build_orders(self, orders: List[Dict[str, Union[str, float]]]) -> list:
+        """Validate orders and resolve symbols and directions"""
+        if not orders:
+            raise ValueError("At least one order is required")
+        batch = []
+        for order in orders:
+            if not order.get("amount"):
+                raise ValueError(f"Amount is required for {order}")
+            batch.append(
+                {
+                    "symbol": order["symbol"],
+                    "amount": float(order["amount"]),
+                    "direction": (
+                        PositionDirection.Long()
+                        if str(order["direction"]).lower() == "long"
+                        else PositionDirection.Short()
+                    ),
+                    "market_index": drift_perp_markets_dict[order["symbol"]][
+                        "marketIndex"
+                    ],
+                }
+            )
+        return batch
+
+    def _format_results(self, results: list) -> str:
+        """Render per-order results for the model"""
+        lines = []
+        for result in results:
+            line = f"{result['symbol']} {result['amount']}: {result['status']}"
+            if result["signature"]:
+                line += f", transaction signature: {result['signature']}"
+            if result.get("error"):
+                line += f", error: {result['error']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _run(self, orders: List[Dict[str, Union[str, float]]]) -> str:
+        """Place a batch of orders on Drift Exchange."""
+        try:
+            results = run_sync(place_orders_batch(self._build_orders(orders)))
+            return self._format_results(results)
+        except Exception as e:
+            return f"Error placing orders: {str(e)}"
+
+    async def _arun(self, orders: List[Dict[str, Union[str, float]]]) -> str:
+        """Async version of _run"""
+        try:
+            results = await run_in_background(
+                place_orders_batch(self._build_orders(orders))
+            )
+            return self._format_results(results)
+        except Exception as e:
+            return f"Error placing orders: {str(e)}"
+
+
 # Example usage:
 async def main():
     order_tool = DriftOrderTool()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import os
+import sys
+
+from solana.rpc.commitment import Confirmed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.tool_cache import TTLCache
+
+
+class OrderStatePrefetcher:
+    """Keeps the state an order needs before signing warm in a TTLCache.
+
+    A background task refreshes the latest blockhash every `interval` seconds.
+    Solana has no blockhash subscription, so it is polled at Confirmed, the
+    default of driftpy's StandardTxSender: a finalized blockhash is already
+    about 30 slots old when it is fetched. A confirmed blockhash stays valid
+    for about 60 seconds, so with the default ttl the order path can sign
+    from the cache without a round trip. Account state needs no prefetching,
+    the DriftClient's websocket subscriber keeps it current.
+    """
+
+    def __init__(self, client, interval=5.0, ttl=30.0):
+        self.client = client
+        self.interval = interval
+        self.cache = TTLCache(ttl)
+        self._task = None
+
+    async def refresh(self):
+        """Fetch a new blockhash"""
+        response = await self.client.connection.get_latest_blockhash(Confirmed)
+        self.cache.set("blockhash", response.value.blockhash)
+
+    async def _refresh_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing order state: {e}")
+
+    async def start(self):
+        """Warm the cache once and keep refreshing it in the background"""
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.cache.clear()
+
+    def get_blockhash(self):
+        """Cached blockhash, or None once it is older than the ttl"""
+        return self.cache.get("blockhash")
@@ -1,6 +1,10 @@
-from .drift_constants import drift_perp_markets_dict
-from typing import Optional, Literal
+from .drift_constants import drift_perp_markets, drift_perp_markets_dict
+from .event_loop import run_sync, run_in_background
+from .tool_cache import ToolCache
+from .tool_specs import DRIFT_CANDLE_DATA_DESCRIPTION, DriftCandleDataInput
+from typing import Optional, Literal, Type
 from langchain_core.tools import BaseTool
+from pydantic import BaseModel
 import aiohttp
 import asyncio
 from loguru import logger
@@ -9,6 +13,47 @@ from enum import Enum
 import pandas as pd
 from datetime import datetime
 
+_session = None
+
+# Downloads in progress by output path, shared by every tool instance and session
+_downloads = {}
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Return the HTTP session shared by all downloads on the background loop"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+
+def _candle_cache_key(tool, args):
+    # Exactly the values _download_candles validates, so "sol" never hits "SOL"
+    return [
+        tool.download_dir,
+        args["base_asset_symbol"],
+        args["resolution"],
+        args["year"],
+    ]
+
+
+def _candle_ttl(args):
+    # Past years never change; the current year gains candles all the time
+    year = args["year"].strip()
+    return None if year.isdigit() and int(year) < datetime.now().year else 900
+
+
+def _candle_file_exists(result):
+    return os.path.exists(result.rsplit(" to ", 1)[-1])
+
+
+candle_cache = ToolCache(
+    "drift_candle_data",
+    ttl=_candle_ttl,
+    key=_candle_cache_key,
+    validate=_candle_file_exists,
+)
+
 
 class CandleResolution(Enum):
     ONE_MINUTE = "1"
@@ -21,17 +66,8 @@ class CandleResolution(Enum):
 
 class DriftCandleDataTool(BaseTool):
     name: str = "drift_candle_data"
-    description: str = """
-    Downloads historical candle data from Drift exchange.
-    Use this tool to download data for the ticker a user is interested in.
-    Input should be a JSON string with the following parameters:
-    - base_asset_symbol: Base asset symbol (e.g., "SOL")
-    - resolution: Candle resolution: "1", "15", "60", "240", "D", "W". 
-    "1" is for a 1 minute candle, "15" is for 15 minute candles, "60" is for 1 hour candles, 
-    "240" is for 4 hours candles, "D" is for daily candles, "W" is for weekly candles
-    - year: Year of data (e.g., "2024")
-    Returns the path to the downloaded CSV file. If an error occurs, it will return an error message.
-    """
+    description: str = DRIFT_CANDLE_DATA_DESCRIPTION
+    args_schema: Type[BaseModel] = DriftCandleDataInput
 
     base_url: str = """
     Base URL for the drift historical data.
@@ -74,20 +110,52 @@ class DriftCandleDataTool(BaseTool):
 
     async def _download_file(self, url: str, output_path: str) -> None:
         """Download the CSV file"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    with open(output_path, "wb") as f:
-                        while True:
-                            chunk = await response.content.read(8192)
-                            if not chunk:
-                                break
-                            f.write(chunk)
-                else:
-                    raise Exception(f"Failed to download file: HTTP {response.status}")
-
+        session = _get_session()
+        # Write next to the target and rename, so readers never see a partial file
+        partial_path = f"{output_path}.part"
+        async with session.get(url) as response:
+            if response.status == 200:
+                with open(partial_path, "wb") as f:
+                    while True:
+                        chunk = await response.content.read(8192)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+            else:
+                raise Exception(f"Failed to download file: HTTP {response.status}")
+        os.replace(partial_path, output_path)
+
+    async def _fetch_shared(self, url: str, output_path: str, year: str) -> None:
+        """Download into the shared store unless the file is already there.
+
+        Past years never change, so a stored file is reused as is, and
+        concurrent requests for the same file wait on a single download.
+        """
+        is_complete_year = int(year) < datetime.now().year
+        if (
+            is_complete_year
+            and os.path.exists(output_path)
+            and os.path.getsize(output_path) > 0
+        ):
+            return
+        if output_path not in _downloads:
+            task = asyncio.ensure_future(self._download_file(url, output_path))
+            _downloads[output_path] = task
+            task.add_done_callback(lambda _: _downloads.pop(output_path, None))
+        await asyncio.shield(_downloads[output_path])
+
+    @candle_cache
     async def _arun(self, base_asset_symbol: str, resolution: str, year: str) -> str:
         """Async run the candle data download"""
+        # The pooled HTTP session lives on the shared background loop
+        return await run_in_background(
+            self._download_candles(base_asset_symbol, resolution, year)
+        )
+
+    async def _download_candles(
+        self, base_asset_symbol: str, resolution: str, year: str
+    ) -> str:
+        """Validate the inputs and download the candle data"""
         try:
             if base_asset_symbol not in drift_perp_markets_dict:
                 return f"Error: Invalid base asset symbol. Must be one of {[m['baseAssetSymbol'] for m in drift_perp_markets]}"
@@ -105,12 +173,12 @@ class DriftCandleDataTool(BaseTool):
             output_path = self._get_output_path(base_asset_symbol, resolution, year)
 
             # Download file
-            await self._download_file(url, output_path)
+            await self._fetch_shared(url, output_path, year)
 
             # Validate downloaded file
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                # Load and validate CSV
-                df = pd.read_csv(output_path)
+                # Load and validate CSV off the loop so concurrent downloads keep going
+                df = await asyncio.to_thread(pd.read_csv, output_path)
                 row_count = len(df)
                 return f"Successfully downloaded historical data for {base_asset_symbol} with resolution {resolution} for year {year} to {output_path}"
             else:
@@ -120,9 +188,10 @@ class DriftCandleDataTool(BaseTool):
             logger.error(f"Error downloading candle data: {e}")
             return f"Error: {str(e)}"
 
+    @candle_cache
     def _run(self, base_asset_symbol: str, resolution: str, year: str) -> str:
         """Synchronous run - wraps async method"""
-        return asyncio.run(self._arun(base_asset_symbol, resolution, year))
+        return run_sync(self._download_candles(base_asset_symbol, resolution, year))
 
 
 # Example usage:
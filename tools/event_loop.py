@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_background_loop():
+    """Return the shared event loop, starting its thread on first use.
+
+    Sync tool entry points submit their coroutines here instead of calling
+    asyncio.run(), so HTTP sessions and RPC clients bound to the loop live
+    across calls.
+    """
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="tools-event-loop", daemon=True
+            )
+            thread.start()
+    return _loop
+
+
+def _on_background_loop(loop):
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def run_sync(coro, timeout=None):
+    """Run coro on the background loop and block until it returns"""
+    loop = get_background_loop()
+    if _on_background_loop(loop):
+        coro.close()
+        raise RuntimeError("run_sync() would deadlock on the background loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def run_in_background(coro):
+    """Await coro on the background loop from any other event loop"""
+    loop = get_background_loop()
+    if _on_background_loop(loop):
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
@@ -0,0 +1,407 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.backtesting_engine import backtest_strategies, load_candles
+from tools.strategy_optimizer import SEARCH_SPACES
+
+DEFAULT_LOCAL_STORE = os.getenv("CANDLE_STORE_CACHE", ".candle_store")
+
+
+@lru_cache(maxsize=None)
+def strategy_hash(strategy: str) -> str:
+    """Hash of the code a batch strategy runs, so jobs never mix code versions.
+
+    Covers the whole module defining the strategy class, which holds the
+    indicators and the batch engine it depends on, as loaded by this process.
+    """
+    module = inspect.getmodule(SEARCH_SPACES[strategy][0])
+    # The name keeps strategies of one module apart in job ids
+    source = f"{strategy}\n{inspect.getsource(module)}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class CandleStore:
+    """Content-addressed candle files on shared storage, cached once per node.
+
+    put() copies a candle file to root/<sha256>.csv, so jobs refer to their
+    data by hash and identical files are stored once. fetch() copies a file
+    into the node's local_dir the first time it is needed there and checks
+    its hash, so workers on one node share a single verified copy.
+    """
+
+    def __init__(self, root: str, local_dir: str = DEFAULT_LOCAL_STORE):
+        self.root = root
+        self.local_dir = local_dir
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _copy(source: str, target: str) -> None:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        # Unique temporary name, so concurrent copies never see a partial file
+        part = f"{target}.{uuid.uuid4().hex}.part"
+        shutil.copyfile(source, part)
+        os.replace(part, target)
+
+    def put(self, candle_file: str) -> str:
+        """Add candle_file to the shared store and return its hash"""
+        candles_hash = self.hash_file(candle_file)
+        target = os.path.join(self.root, f"{candles_hash}.csv")
+        if not os.path.exists(target):
+            self._copy(candle_file, target)
+        return candles_hash
+
+    def fetch(self, candles_hash: str) -> str:
+        """Local path of the candles with candles_hash, copying them if needed"""
+        local = os.path.join(self.local_dir, f"{candles_hash}.csv")
+        if os.path.exists(local):
+            return local
+        self._copy(os.path.join(self.root, f"{candles_hash}.csv"), local)
+        if self.hash_file(local) != candles_hash:
+            os.remove(local)
+            raise ValueError(f"Candles in the store don't match hash {candles_hash}")
+        return local
+
+
+class Job(NamedTuple):
+    id: str
+    strategy: str
+    strategy_hash: str
+    candles: str  # CandleStore hash
+    start: int  # candle slice, end exclusive
+    end: Optional[int]  # None runs to the last candle
+    params: Dict[str, int]
+    attempts: int
+
+
+def job_id(
+    strategy_hash: str,
+    candles: str,
+    start: int,
+    end: Optional[int],
+    params: Dict[str, int],
+) -> str:
+    """Deterministic id, so enqueueing the same work twice is a no-op"""
+    key = json.dumps([strategy_hash, candles, start, end, params], sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+def _metric(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+class JobQueue:
+    """Backtest jobs in a SQLite file that workers on any node can share.
+
+    A coordinator enqueues (strategy, candle slice, params) jobs; workers
+    claim a job with a lease of lease_seconds, run it and report its
+    metrics. A worker that dies loses its lease and the job is claimed
+    again, up to max_attempts times. Reports are idempotent: ids are
+    derived from the job's content and only the first result of a job is
+    kept, so reruns and late duplicates change nothing.
+
+    The database uses SQLite's rollback journal rather than WAL, since WAL
+    needs shared memory that network filesystems don't provide.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, strategy TEXT NOT NULL, "
+            "strategy_hash TEXT NOT NULL, candles TEXT NOT NULL, "
+            "start INTEGER NOT NULL, end INTEGER, params TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', worker TEXT, "
+            "lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, error TEXT, created REAL, finished REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until)"
+        )
+
+    def enqueue(
+        self,
+        strategy: str,
+        candles: str,
+        params: Dict[str, int],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> str:
+        return self.enqueue_many(strategy, candles, [params], start, end)[0]
+
+    def enqueue_many(
+        self,
+        strategy: str,
+        candles: str,
+        params_list: List[Dict[str, int]],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> List[str]:
+        """Add jobs unless they already exist; returns their ids"""
+        code_hash = strategy_hash(strategy)
+        rows = [
+            (
+                job_id(code_hash, candles, start, end, params),
+                strategy,
+                code_hash,
+                candles,
+                start,
+                end,
+                json.dumps(params, sort_keys=True),
+                time.time(),
+            )
+            for params in params_list
+        ]
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (id, strategy, strategy_hash, candles, "
+            "start, end, params, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.conn.execute("COMMIT")
+        return [row[0] for row in rows]
+
+    def claim(self, worker: str, limit: int = 1) -> List[Job]:
+        """Lease up to limit claimable jobs on the same candle slice.
+
+        Jobs sharing a slice can be backtested together with shared
+        indicators. Returns an empty list when nothing is claimable.
+        """
+        now = time.time()
+        claimable = (
+            "(status = 'pending' OR (status = 'running' AND lease_until < ?)) "
+            "AND attempts < ?"
+        )
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose last attempt lost its lease won't be retried
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            first = self.conn.execute(
+                f"SELECT candles, start, end, strategy FROM jobs WHERE {claimable} "
+                "ORDER BY created LIMIT 1",
+                (now, self.max_attempts),
+            ).fetchone()
+            rows = []
+            if first is not None:
+                rows = self.conn.execute(
+                    "SELECT id, strategy, strategy_hash, candles, start, end, "
+                    f"params, attempts FROM jobs WHERE {claimable} AND candles = ? "
+                    "AND start = ? AND end IS ? AND strategy = ? "
+                    "ORDER BY created LIMIT ?",
+                    (now, self.max_attempts, *first, limit),
+                ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(worker, now + self.lease_seconds, row[0]) for row in rows],
+            )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return [Job(*row[:6], json.loads(row[6]), row[7] + 1) for row in rows]
+
+    def heartbeat(self, worker: str, ids: List[str]) -> None:
+        """Extend the leases worker holds on ids"""
+        self.conn.executemany(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? "
+            "AND status = 'running'",
+            [(time.time() + self.lease_seconds, key, worker) for key in ids],
+        )
+
+    def complete(self, worker: str, results: Dict[str, dict]) -> None:
+        """Record results by job id; jobs that already have one keep it"""
+        now = time.time()
+        self.conn.executemany(
+            "UPDATE jobs SET status = 'done', worker = ?, result = ?, error = NULL, "
+            "finished = ?, lease_until = NULL WHERE id = ? AND status != 'done'",
+            [(worker, json.dumps(r), now, key) for key, r in results.items()],
+        )
+
+    def fail(self, worker: str, ids: List[str], error: str) -> None:
+        """Release ids for another attempt, or mark them failed after the last"""
+        self.conn.executemany(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' "
+            "ELSE 'pending' END, error = ?, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            [(self.max_attempts, error, key, worker) for key in ids],
+        )
+
+    def counts(self) -> Dict[str, int]:
+        return dict(
+            self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        )
+
+    def results(self, ids: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Results of finished jobs by id, of ids or of the whole queue"""
+        rows = self.conn.execute(
+            "SELECT id, params, result FROM jobs WHERE status = 'done'"
+        ).fetchall()
+        wanted = None if ids is None else set(ids)
+        return {
+            key: {"params": json.loads(params), "metrics": json.loads(result)}
+            for key, params, result in rows
+            if wanted is None or key in wanted
+        }
+
+    def open_jobs(self, ids: Optional[List[str]] = None) -> int:
+        """How many of ids, or of all jobs, are still pending or running"""
+        query = "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')"
+        if ids is None:
+            return self.conn.execute(query).fetchone()[0]
+        count = 0
+        # SQLite limits the number of parameters of one statement
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            count += self.conn.execute(
+                f"{query} AND id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchone()[0]
+        return count
+
+    def wait(
+        self, ids: List[str], poll: float = 1.0, timeout: Optional[float] = None
+    ) -> Dict[str, dict]:
+        """Block until every job in ids is done or failed; returns their results"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.open_jobs(ids):
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"{self.open_jobs(ids)} jobs still open")
+            time.sleep(poll)
+        return self.results(ids)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def submit_sweep(
+    queue: JobQueue,
+    store: CandleStore,
+    candle_file: str,
+    strategy: str,
+    params_list: List[Dict[str, int]],
+    slices: List[Tuple[int, Optional[int]]] = ((0, None),),
+) -> List[str]:
+    """Enqueue every params on every candle slice, e.g. walk-forward folds"""
+    candles = store.put(candle_file)
+    ids = []
+    for start, end in slices:
+        ids.extend(queue.enqueue_many(strategy, candles, params_list, start, end))
+    return ids
+
+
+@lru_cache(maxsize=4)
+def _load_candles(candle_file: str):
+    # Store files are named by content hash, so a parsed file never goes stale
+    return load_candles(candle_file)
+
+
+def run_jobs(jobs: List[Job], candle_file: str) -> Dict[str, dict]:
+    """Backtest jobs sharing one candle slice in a single batch"""
+    candle_data = _load_candles(candle_file).iloc[jobs[0].start : jobs[0].end]
+    strategy_class = SEARCH_SPACES[jobs[0].strategy][0]
+    results = backtest_strategies(
+        candle_data.reset_index(drop=True),
+        [strategy_class(**job.params) for job in jobs],
+    )
+    return {
+        job.id: {name: _metric(value) for name, value in metrics.items()}
+        for job, (metrics, _) in zip(jobs, results)
+    }
+
+
+def _keep_leases(queue: JobQueue, worker: str, ids: List[str], stop):
+    # Own connection: SQLite connections can't be shared between threads
+    heartbeat = JobQueue(queue.path, queue.lease_seconds, queue.max_attempts)
+    try:
+        while not stop.wait(queue.lease_seconds / 3):
+            heartbeat.heartbeat(worker, ids)
+    finally:
+        heartbeat.close()
+
+
+def run_worker(
+    queue_path: str,
+    store_root: str,
+    worker: Optional[str] = None,
+    local_dir: str = DEFAULT_LOCAL_STORE,
+    batch: int = 16,
+    idle_timeout: float = 10,
+    poll: float = 0.5,
+    lease_seconds: float = 300,
+) -> int:
+    """Claim and run jobs until no job has been open for idle_timeout seconds.
+
+    Up to batch jobs on the same candle slice are claimed and backtested
+    together, with their leases renewed while they run. Returns the number
+    of jobs this worker completed.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(queue_path, lease_seconds)
+    store = CandleStore(store_root, local_dir)
+    completed, idle_since = 0, time.time()
+    try:
+        while True:
+            jobs = queue.claim(worker, batch)
+            if not jobs:
+                # Jobs leased by other workers may still come back if they die
+                if queue.open_jobs():
+                    idle_since = time.time()
+                elif time.time() - idle_since > idle_timeout:
+                    return completed
+                time.sleep(poll)
+                continue
+            ids = [job.id for job in jobs]
+            if jobs[0].strategy_hash != strategy_hash(jobs[0].strategy):
+                queue.fail(worker, ids, f"{worker} runs other strategy code")
+                continue
+            stop = threading.Event()
+            threading.Thread(
+                target=_keep_leases, args=(queue, worker, ids, stop), daemon=True
+            ).start()
+            try:
+                results = run_jobs(jobs, store.fetch(jobs[0].candles))
+            except Exception as e:
+                queue.fail(worker, ids, f"{type(e).__name__}: {e}")
+                continue
+            finally:
+                stop.set()
+            queue.complete(worker, results)
+            completed += len(results)
+            idle_since = time.time()
+    finally:
+        queue.close()
+
+
+# Example usage: python tools/job_queue.py jobs.sqlite /shared/candles
+if __name__ == "__main__":
+    print(run_worker(sys.argv[1], sys.argv[2]))
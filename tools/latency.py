@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf")]
+
+
+class LatencyRecorder:
+    """Rolling per-stage latency samples with percentile and histogram views.
+
+    Each stage keeps its last `window` samples (all samples if window is None).
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage):
+        """Time the enclosed block and record it under stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def stages(self):
+        with self._lock:
+            return list(self._samples)
+
+    def samples(self, stage):
+        """Return the recorded samples of stage in milliseconds"""
+        with self._lock:
+            return np.asarray(self._samples.get(stage, ()), dtype=float) * 1000
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Percentiles, count and max per stage in milliseconds"""
+        summary = {}
+        for stage in self.stages():
+            values_ms = self.samples(stage)
+            if not len(values_ms):
+                continue
+            summary[stage] = {
+                f"p{p}": float(np.percentile(values_ms, p)) for p in percentiles
+            }
+            summary[stage]["count"] = len(values_ms)
+            summary[stage]["max"] = float(values_ms.max())
+        return summary
+
+    def histogram(self, stage):
+        """Sample counts per BUCKETS_MS bucket for stage"""
+        counts, _ = np.histogram(self.samples(stage), bins=[0] + BUCKETS_MS)
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS[:-1]]
+        labels.append(f">{BUCKETS_MS[-2]}ms")
+        return {label: int(count) for label, count in zip(labels, counts)}
+
+    def export(self, path):
+        """Write the summary and histograms of every stage to a JSON file"""
+        report = {
+            "summary": self.summary(),
+            "histograms": {
+                stage: self.histogram(stage) for stage in list(self._samples)
+            },
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+# Shared recorder for the order path, see drift_interface.place_order
+order_latency = LatencyRecorder()
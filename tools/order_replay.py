@@ -0,0 +1,298 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+from loguru import logger
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from driftpy.types import PositionDirection, OrderParams
+from driftpy.constants.numeric_constants import BASE_PRECISION
+from driftpy.tx.types import TxSigAndSlot
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+from tools.drift_constants import drift_perp_markets_dict
+from tools.drift_interface import (
+    build_drift_client,
+    configure,
+    place_order,
+    place_orders_batch,
+    settings,
+    shutdown,
+)
+from tools.backtesting_engine import example_strategy
+from tools.latency import LatencyRecorder, order_latency
+
+STUB_PROGRAM_ID = Pubkey.default()
+
+
+class StubRpcConnection:
+    """Stand-in for the AsyncClient RPC calls made on the order path"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = []
+
+    async def _respond(self, value):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(value=value)
+
+    async def get_latest_blockhash(self, *args, **kwargs):
+        return await self._respond(
+            SimpleNamespace(blockhash=Hash.default(), last_valid_block_height=0)
+        )
+
+    async def send_raw_transaction(self, txn, opts=None):
+        self.sent.append(txn)
+        return await self._respond(Signature.default())
+
+    async def confirm_transaction(self, tx_sig, *args, **kwargs):
+        return await self._respond([None])
+
+    async def close(self):
+        pass
+
+
+class StubTxSender:
+    """Stand-in for driftpy's StandardTxSender on a StubRpcConnection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def fetch_latest_blockhash(self):
+        return (await self.connection.get_latest_blockhash()).value.blockhash
+
+    async def get_versioned_tx(
+        self, ixs, payer, lookup_tables, additional_signers=None
+    ):
+        blockhash = await self.fetch_latest_blockhash()
+        message = MessageV0.try_compile(payer.pubkey(), ixs, lookup_tables, blockhash)
+        return VersionedTransaction(message, [payer, *(additional_signers or [])])
+
+    async def send(self, tx):
+        tx_sig = (await self.connection.send_raw_transaction(bytes(tx))).value
+        await self.connection.confirm_transaction(tx_sig)
+        return TxSigAndSlot(tx_sig, 0)
+
+
+class StubDriftClient:
+    """Local stand-in for DriftClient that never touches the network.
+
+    Serves the drift_interface.place_order and place_orders_batch paths
+    through its stub tx sender and connection, whose calls each take
+    rpc_latency seconds, e.g. configure(client_factory=StubDriftClient).
+    Like DriftClient, it only builds orders for the perp markets it was
+    given, defaulting to the configured perp_market_indexes.
+    """
+
+    def __init__(self, rpc_latency: float = 0.0, perp_market_indexes=None):
+        self.orders = []
+        if perp_market_indexes is None:
+            perp_market_indexes = settings["perp_market_indexes"]
+        self.perp_market_indexes = set(perp_market_indexes)
+        self.connection = StubRpcConnection(rpc_latency)
+        self.wallet = SimpleNamespace(payer=Keypair())
+        self.account_subscriber = self
+        self.tx_sender = StubTxSender(self.connection)
+        self.last_perp_market_seen_cache = {}
+
+    async def subscribe(self):
+        pass
+
+    async def unsubscribe(self):
+        pass
+
+    def switch_active_user(self, sub_account_id=0):
+        pass
+
+    def convert_to_perp_precision(self, amount):
+        return int(amount * BASE_PRECISION)
+
+    def get_perp_market_account(self, market_index):
+        # DriftClient raises KeyError for markets it is not subscribed to
+        if market_index not in self.perp_market_indexes:
+            raise KeyError(market_index)
+        return SimpleNamespace(market_index=market_index)
+
+    def get_place_perp_order_ix(self, order_params: OrderParams):
+        self.get_perp_market_account(order_params.market_index)
+        self.orders.append(order_params)
+        return Instruction(STUB_PROGRAM_ID, bytes(8), [])
+
+    def get_place_orders_ix(self, order_params, sub_account_id=None):
+        for params in order_params:
+            self.get_perp_market_account(params.market_index)
+        self.orders.extend(order_params)
+        return Instruction(STUB_PROGRAM_ID, bytes(8), [])
+
+    async def place_orders(self, order_params, sub_account_id=None):
+        tx_sig_and_slot = await self.send_ixs(
+            [self.get_place_orders_ix(order_params, sub_account_id)]
+        )
+        for params in order_params:
+            self.last_perp_market_seen_cache[params.market_index] = (
+                tx_sig_and_slot.slot
+            )
+        return tx_sig_and_slot.tx_sig
+
+    async def send_ixs(self, ixs, signers=None, lookup_tables=None):
+        tx = await self.tx_sender.get_versioned_tx(
+            list(ixs), self.wallet.payer, lookup_tables or [], signers
+        )
+        return await self.tx_sender.send(tx)
+
+
+def _order_args(direction, symbol):
+    """PositionDirection and market index the way DriftOrderTool resolves them"""
+    market_index = drift_perp_markets_dict[symbol]["marketIndex"]
+    direction = (
+        PositionDirection.Long()
+        if direction.lower() == "long"
+        else PositionDirection.Short()
+    )
+    return direction, market_index
+
+
+async def replay_candles(
+    candle_file,
+    strategy_function=example_strategy,
+    symbol="SOL",
+    amount=0.1,
+    speed=None,
+    client_factory=StubDriftClient,
+):
+    """Replay a stored Drift candle file through the live order path.
+
+    Every candle runs the strategy on the growing window and every signal is
+    placed with drift_interface.place_order, on a client from client_factory
+    (a StubDriftClient by default). speed is the replay speed-up over wall
+    clock time (e.g. 60 replays one minute of candles per second); None
+    replays as fast as possible.
+
+    Returns the per-stage latency percentiles, including place_order's own
+    stages, and the number of orders sent.
+    """
+    candle_data = pd.read_csv(candle_file)
+    timestamps = candle_data["start"].to_numpy()
+    candle_data["start"] = pd.to_datetime(candle_data["start"], unit="ms")
+
+    positions = pd.DataFrame(
+        {
+            "Size": pd.Series(dtype="float"),
+            "Entry Time": pd.Series(dtype="datetime64[ms]"),
+            "Entry Price": pd.Series(dtype="float"),
+        }
+    )
+    recorder = LatencyRecorder(window=None)
+    orders_sent = 0
+
+    configure(client_factory=client_factory)
+    try:
+        replay_start = time.perf_counter()
+        for i in range(1, len(candle_data) + 1):
+            if speed:
+                # Wait until the candle would have arrived at the requested speed
+                due = (timestamps[i - 1] - timestamps[0]) / 1000 / speed
+                delay = due - (time.perf_counter() - replay_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            candle_arrival = time.perf_counter()
+            window_data = candle_data.iloc[:i]
+            position = strategy_function(window_data, positions)
+            signal_ready = time.perf_counter()
+            recorder.record("strategy", signal_ready - candle_arrival)
+
+            if not position:
+                continue
+
+            direction, market_index = _order_args(
+                "long" if position["Size"] > 0 else "short", symbol
+            )
+            await place_order(amount, direction, market_index, recorder=recorder)
+            recorder.record("signal_to_order", time.perf_counter() - candle_arrival)
+            orders_sent += 1
+
+            positions = pd.concat(
+                [positions, pd.DataFrame([position])], ignore_index=True
+            )
+    finally:
+        await shutdown()
+        configure(client_factory=build_drift_client)
+
+    return {
+        "candles": len(candle_data),
+        "orders": orders_sent,
+        "latency_ms": recorder.summary(),
+    }
+
+
+async def profile_order_path(orders=100, rpc_latency=0.0):
+    """Run drift_interface.place_order against a StubDriftClient.
+
+    Returns the per-stage breakdown recorded in order_latency.
+    """
+    configure(client_factory=lambda: StubDriftClient(rpc_latency=rpc_latency))
+    order_latency.reset()
+    try:
+        for _ in range(orders):
+            await place_order(0.1, PositionDirection.Long())
+    finally:
+        await shutdown()
+        configure(client_factory=build_drift_client)
+    return order_latency.summary()
+
+
+async def replay_batch(
+    orders=(("SOL", "long", 0.1), ("BTC", "short", 0.001), ("ETH", "long", 0.01)),
+    client_factory=StubDriftClient,
+):
+    """Send one batch over several markets through place_orders_batch.
+
+    orders are (symbol, direction, amount) tuples. Returns the per-order
+    results; an order on a market the client is not subscribed to comes
+    back 'failed' with its KeyError.
+    """
+    batch = []
+    for symbol, direction, amount in orders:
+        direction, market_index = _order_args(direction, symbol)
+        batch.append(
+            {
+                "symbol": symbol,
+                "amount": amount,
+                "direction": direction,
+                "market_index": market_index,
+            }
+        )
+
+    configure(client_factory=client_factory)
+    try:
+        return await place_orders_batch(batch)
+    finally:
+        await shutdown()
+        configure(client_factory=build_drift_client)
+
+
+# Example usage:
+async def main():
+    result = await replay_candles(
+        "./data/perp_SOL_15_2024.csv",
+        symbol="SOL",
+        client_factory=lambda: StubDriftClient(rpc_latency=0.01),
+    )
+    logger.info(result)
+    logger.info(await profile_order_path(rpc_latency=0.01))
+    logger.info(await replay_batch())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,280 @@
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from tools.blankly_cache import (
+    DEFAULT_CACHE_LOCATION,
+    DRIFT_TO_BLANKLY,
+    drift_to_blankly,
+    write_price_cache,
+)
+
+# Drift candle resolutions and their length in seconds
+RESOLUTION_SECONDS = {
+    "1": 60,
+    "15": 900,
+    "60": 3600,
+    "240": 14400,
+    "D": 86400,
+    "W": 604800,
+}
+
+DRIFT_FILE = re.compile(
+    r"perp_(?P<symbol>.+)_(?P<resolution>[^_]+)_(?P<year>\d{4})\.csv"
+)
+
+
+class CacheEntry(NamedTuple):
+    """One cached candle file; times are unix seconds and end is exclusive"""
+
+    path: str
+    layout: str  # "drift" or "blankly"
+    symbol: str  # base asset, e.g. BTC
+    resolution: int
+    start: int
+    end: int
+    size: int
+
+
+def resolution_seconds(resolution: Union[int, str]) -> int:
+    """Seconds of a Drift resolution code ("15", "D") or of a number of seconds"""
+    if isinstance(resolution, str) and resolution in RESOLUTION_SECONDS:
+        return RESOLUTION_SECONDS[resolution]
+    return int(resolution)
+
+
+def blankly_to_drift(prices: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of drift_to_blankly: the columns the native engine reads"""
+    candles = pd.DataFrame({"start": prices["time"].to_numpy(dtype=np.int64) * 1000})
+    for drift_column, blankly_column in DRIFT_TO_BLANKLY.items():
+        candles[drift_column] = prices[blankly_column].to_numpy()
+    return candles
+
+
+def _first_and_last_value(path: str, column: str):
+    """First and last value of column in a CSV without reading the whole file"""
+    with open(path, "rb") as f:
+        header = f.readline().decode().strip().split(",")
+        first = f.readline().decode().strip()
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        last = f.read().decode().strip().splitlines()[-1]
+    if not first:
+        return None
+    index = header.index(column)
+    return int(float(first.split(",")[index])), int(float(last.split(",")[index]))
+
+
+class PriceCacheIndex:
+    """Catalog of the blankly price caches and the native engine's Drift candles.
+
+    Both layouts are indexed by symbol, resolution and time range, so a range
+    query is answered by stitching and slicing whatever cached files cover it,
+    in either layout, instead of downloading or converting again. Entries are
+    rescanned when their file changes. evict() deletes the least recently
+    used blankly cache files until they fit in max_bytes; the native engine's
+    Drift downloads are only evicted on request.
+    """
+
+    def __init__(
+        self,
+        blankly_location: str = DEFAULT_CACHE_LOCATION,
+        drift_location: str = "data",
+        max_bytes: Optional[int] = None,
+    ):
+        self.blankly_location = blankly_location
+        self.drift_location = drift_location
+        self.max_bytes = max_bytes
+        self._entries: Dict[str, tuple] = {}
+        self._last_used: Dict[str, float] = {}
+
+    def _parse(self, path: str, layout: str, size: int) -> Optional[CacheEntry]:
+        name = os.path.basename(path)
+        if layout == "blankly":
+            parts = name[: -len(".csv")].split(",")
+            if len(parts) != 6:
+                return None
+            _, _, symbol, start, end, resolution = parts
+            return CacheEntry(
+                path,
+                layout,
+                symbol.split("-")[0],
+                int(resolution),
+                int(start),
+                int(end),
+                size,
+            )
+
+        match = DRIFT_FILE.fullmatch(name)
+        if match is None or match["resolution"] not in RESOLUTION_SECONDS:
+            return None
+        span = _first_and_last_value(path, "start")
+        if span is None:
+            return None
+        resolution = RESOLUTION_SECONDS[match["resolution"]]
+        return CacheEntry(
+            path,
+            layout,
+            match["symbol"],
+            resolution,
+            span[0] // 1000,
+            span[1] // 1000 + resolution,
+            size,
+        )
+
+    def scan(self) -> List[CacheEntry]:
+        """Every cached candle file, reparsing only files that changed"""
+        seen = set()
+        for location, layout in (
+            (self.blankly_location, "blankly"),
+            (self.drift_location, "drift"),
+        ):
+            if not os.path.isdir(location):
+                continue
+            for name in os.listdir(location):
+                if not name.endswith(".csv"):
+                    continue
+                path = os.path.join(location, name)
+                stat = os.stat(path)
+                seen.add(path)
+                cached = self._entries.get(path)
+                if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+                    entry = self._parse(path, layout, stat.st_size)
+                    self._entries[path] = ((stat.st_mtime_ns, stat.st_size), entry)
+                    self._last_used.setdefault(path, stat.st_mtime)
+
+        for path in set(self._entries) - seen:
+            del self._entries[path]
+            self._last_used.pop(path, None)
+        return [entry for _, entry in self._entries.values() if entry is not None]
+
+    def find(
+        self,
+        symbol: str,
+        resolution: Union[int, str],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[CacheEntry]:
+        """Entries of symbol at resolution overlapping [start, end), by start"""
+        resolution = resolution_seconds(resolution)
+        symbol = symbol.split("-")[0]
+        return sorted(
+            (
+                e
+                for e in self.scan()
+                if e.symbol == symbol
+                and e.resolution == resolution
+                and (end is None or e.start < end)
+                and (start is None or e.end > start)
+            ),
+            key=lambda e: (e.start, -e.end),
+        )
+
+    def covering(
+        self, symbol: str, resolution: Union[int, str], start: int, end: int
+    ) -> Optional[List[CacheEntry]]:
+        """Fewest entries that together cover [start, end), or None if there is a gap"""
+        candidates = self.find(symbol, resolution, start, end)
+        chosen, cursor = [], start
+        while cursor < end:
+            reaching = [e for e in candidates if e.start <= cursor < e.end]
+            if not reaching:
+                return None
+            best = max(reaching, key=lambda e: e.end)
+            chosen.append(best)
+            cursor = best.end
+        return chosen
+
+    def _load(self, entry: CacheEntry) -> pd.DataFrame:
+        """Entry's candles in blankly's layout"""
+        self._last_used[entry.path] = time.time()
+        if entry.layout == "blankly":
+            prices = pd.read_csv(entry.path)
+            return prices.drop(columns=["Unnamed: 0"], errors="ignore")
+        return drift_to_blankly(
+            pd.read_csv(entry.path, usecols=["start", *DRIFT_TO_BLANKLY])
+        )
+
+    def query(
+        self,
+        symbol: str,
+        resolution: Union[int, str],
+        start: int,
+        end: int,
+        layout: str = "blankly",
+    ) -> Optional[pd.DataFrame]:
+        """Candles of symbol in [start, end) from the cache, or None on a miss.
+
+        start and end are unix seconds; layout picks the returned columns,
+        "blankly" (time, low, high, open, close, volume) or "drift" (start in
+        milliseconds and the fill prices).
+        """
+        entries = self.covering(symbol, resolution, start, end)
+        if entries is None:
+            return None
+        prices = pd.concat([self._load(e) for e in entries], ignore_index=True)
+        prices = prices.drop_duplicates("time").sort_values("time")
+        prices = prices[(prices["time"] >= start) & (prices["time"] < end)]
+        prices = prices.reset_index(drop=True)
+        return prices if layout == "blankly" else blankly_to_drift(prices)
+
+    def blankly_cache_file(
+        self, symbol: str, resolution: Union[int, str], start: int, end: int
+    ) -> Optional[str]:
+        """A blankly cache file covering [start, end), written from cached data if needed.
+
+        A written file is named after the requested range rather than the
+        candles found, so the same request hits it even when the data ends early.
+        """
+        for entry in self.find(symbol, resolution, start, end):
+            # Blankly slices cache files to the backtest range itself
+            if entry.layout == "blankly" and entry.start <= start and entry.end >= end:
+                self._last_used[entry.path] = time.time()
+                return entry.path
+        if self.covering(symbol, resolution, start, end) is None:
+            return None
+        prices = self.query(symbol, resolution, start, end, layout="drift")
+        path = write_price_cache(
+            prices,
+            symbol,
+            resolution=resolution_seconds(resolution),
+            cache_location=self.blankly_location,
+            start=start,
+            end=end,
+        )
+        self.evict()
+        return path
+
+    def total_bytes(self) -> int:
+        return sum(e.size for e in self.scan())
+
+    def evict(
+        self, max_bytes: Optional[int] = None, include_drift: bool = False
+    ) -> List[str]:
+        """Delete least recently used blankly cache files until they fit in max_bytes.
+
+        With include_drift, the Drift candle files count and are evicted too.
+        Returns the deleted paths.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return []
+        entries = sorted(
+            (e for e in self.scan() if include_drift or e.layout == "blankly"),
+            key=lambda e: self._last_used.get(e.path, 0),
+        )
+        total = sum(e.size for e in entries)
+        evicted = []
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            os.remove(entry.path)
+            total -= entry.size
+            evicted.append(entry.path)
+        if evicted:
+            self.scan()
+        return evicted
@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+import sys
+from typing import Dict, List, Optional, Type, Union
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, PrivateAttr
+
+from tools.tool_specs import (
+    BACKTEST_RESULT_DESCRIPTION,
+    BACKTESTING_DESCRIPTION,
+    DRIFT_BATCH_ORDER_DESCRIPTION,
+    DRIFT_CANDLE_DATA_DESCRIPTION,
+    DRIFT_ORDER_DESCRIPTION,
+    SOLANA_BALANCE_DESCRIPTION,
+    BacktestingInput,
+    BacktestResultInput,
+    DriftBatchOrderInput,
+    DriftCandleDataInput,
+    DriftOrderInput,
+    SolanaBalanceInput,
+)
+
+
+class LazyTool(BaseTool):
+    """Lightweight descriptor for a tool whose module is imported on first use.
+
+    The agent only needs a tool's name, description and argument schema to
+    bind it to the model, so startup never imports driftpy, solana or pandas.
+    The real tool is built from `target` ("module:Class") on the first call.
+    """
+
+    target: str
+    _tool: Optional[BaseTool] = PrivateAttr(default=None)
+
+    def load(self) -> BaseTool:
+        """Import and instantiate the real tool"""
+        if self._tool is None:
+            module_name, class_name = self.target.split(":")
+            tool_class = getattr(importlib.import_module(module_name), class_name)
+            self._tool = tool_class()
+        return self._tool
+
+    def _run(self, *args, **kwargs):
+        return self.load()._run(*args, **kwargs)
+
+    async def _arun(self, *args, **kwargs):
+        if self._tool is None:
+            # Importing e.g. driftpy takes seconds; keep the loop free for the
+            # other tool calls of the same agent step meanwhile
+            await asyncio.to_thread(self.load)
+        return await self._tool._arun(*args, **kwargs)
+
+
+# Descriptions and schemas are shared with the tool classes, see tools.tool_specs
+TOOL_SPECS: List[Dict[str, Union[str, Type[BaseModel]]]] = [
+    {
+        "name": "solana_balance",
+        "target": "tools.sol_balance:SolanaBalanceTool",
+        "args_schema": SolanaBalanceInput,
+        "description": SOLANA_BALANCE_DESCRIPTION,
+    },
+    {
+        "name": "drift_candle_data",
+        "target": "tools.drift_tools:DriftCandleDataTool",
+        "args_schema": DriftCandleDataInput,
+        "description": DRIFT_CANDLE_DATA_DESCRIPTION,
+    },
+    {
+        "name": "BacktestingTool",
+        "target": "tools.backtesting_tool:BacktestingTool",
+        "args_schema": BacktestingInput,
+        "description": BACKTESTING_DESCRIPTION,
+    },
+    {
+        "name": "BacktestResultTool",
+        "target": "tools.backtesting_tool:BacktestResultTool",
+        "args_schema": BacktestResultInput,
+        "description": BACKTEST_RESULT_DESCRIPTION,
+    },
+    {
+        "name": "DriftOrderTool",
+        "target": "tools.drift_place_order:DriftOrderTool",
+        "args_schema": DriftOrderInput,
+        "description": DRIFT_ORDER_DESCRIPTION,
+    },
+    {
+        "name": "DriftBatchOrderTool",
+        "target": "tools.drift_place_order:DriftBatchOrderTool",
+        "args_schema": DriftBatchOrderInput,
+        "description": DRIFT_BATCH_ORDER_DESCRIPTION,
+    },
+]
+
+
+def lazy_tools() -> List[LazyTool]:
+    """One LazyTool per registered tool, in registration order"""
+    return [LazyTool(**spec) for spec in TOOL_SPECS]
+
+
+async def close_tools() -> None:
+    """Close the pooled clients of the tool modules that were loaded"""
+    from tools.event_loop import run_in_background
+
+    # Modules never loaded have nothing open and are not imported here
+    sol_balance = sys.modules.get("tools.sol_balance")
+    if sol_balance is not None:
+        await run_in_background(sol_balance.close_clients())
@@ -1,51 +1,127 @@
-from typing import Optional
+from typing import Dict, List, Optional, Type
 from langchain_core.tools import BaseTool
+from pydantic import BaseModel
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import DataSliceOpts
 import asyncio
 from loguru import logger
 from solders.pubkey import Pubkey
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.event_loop import run_sync, run_in_background
+from tools.solana_rpc import ResilientAsyncClient, rpc_urls
+from tools.tool_cache import ToolCache, TTLCache
+from tools.tool_specs import SOLANA_BALANCE_DESCRIPTION, SolanaBalanceInput
+
+# getMultipleAccounts accepts at most 100 addresses per request
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# One client per RPC url list, all living on the shared background loop
+_clients: Dict[str, AsyncClient] = {}
+
+# Balance caches per (rpc_url, ttl), shared by every tool instance
+_balance_caches: Dict[tuple, TTLCache] = {}
+
+
+def get_client(rpc_url: str) -> AsyncClient:
+    """Return the pooled client for a comma separated list of RPC urls"""
+    if rpc_url not in _clients:
+        _clients[rpc_url] = ResilientAsyncClient(rpc_urls(rpc_url))
+    return _clients[rpc_url]
+
+
+async def close_clients() -> None:
+    """Close every pooled client"""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.close()
+
+
+def parse_addresses(address: str) -> List[str]:
+    """Split a comma or whitespace separated list of addresses"""
+    return [a for a in address.replace(",", " ").split() if a]
+
+
+# Whole tool answers; balances of single addresses are cached in get_balances
+balance_cache = ToolCache(
+    "solana_balance",
+    ttl=10.0,
+    key=lambda tool, args: [tool.rpc_url, parse_addresses(args["address"])],
+)
 
 
 class SolanaBalanceTool(BaseTool):
     name: str = "solana_balance"
-    description: str = """
-    Useful for checking SOL balance of a Solana wallet address.
-    Input should be a valid Solana public key/wallet address.
-    Returns the balance in SOL.
-    """
+    description: str = SOLANA_BALANCE_DESCRIPTION
+    args_schema: Type[BaseModel] = SolanaBalanceInput
     rpc_url: str = """
     RPC url for the Solana network. 
     Default is mainnet-beta. 
     Do not change this unless specifically asked to use a different network.
     """
+    cache_ttl: float = 10.0
 
-    def __init__(self, rpc_url: str = "https://api.mainnet-beta.solana.com"):
+    def __init__(self, rpc_url: Optional[str] = None, cache_ttl=10.0):
         super().__init__()
-        self.rpc_url = rpc_url
+        # Defaults to the shared SOLANA_RPC_URLS endpoint list
+        self.rpc_url = ",".join(rpc_urls(rpc_url))
+        self.cache_ttl = cache_ttl
 
-    async def _arun(self, address: str) -> str:
-        """Async run the SOL balance check"""
+    async def get_balances(self, addresses: List[str]) -> Dict[str, int]:
+        """Lamport balances of addresses, fetched with getMultipleAccounts.
+
+        Recently fetched balances are served from a per-address TTL cache and
+        accounts that do not exist yet report 0.
+        """
+        cache = _balance_caches.setdefault(
+            (self.rpc_url, self.cache_ttl), TTLCache(self.cache_ttl)
+        )
+        balances = {a: cache.get(a) for a in addresses}
+        missing = list(dict.fromkeys(a for a, b in balances.items() if b is None))
+
+        client = get_client(self.rpc_url)
+        for i in range(0, len(missing), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = missing[i : i + MAX_ACCOUNTS_PER_REQUEST]
+            response = await client.get_multiple_accounts(
+                [Pubkey.from_string(a) for a in chunk],
+                # Only lamports are needed, skip the account data
+                data_slice=DataSliceOpts(offset=0, length=0),
+            )
+            for a, account in zip(chunk, response.value):
+                balances[a] = account.lamports if account is not None else 0
+                cache.set(a, balances[a])
+        return balances
+
+    async def _check_balances(self, address: str) -> str:
+        """Format the SOL balance of every address in the input"""
         try:
-            client = AsyncClient(self.rpc_url)
+            addresses = parse_addresses(address)
+            if not addresses:
+                return "Error: At least one address is required"
 
-            # Query balance
-            response = await client.get_balance(Pubkey.from_string(address))
+            balances = await self.get_balances(addresses)
 
-            balance_lamports = response.value  # Direct access to value
-            balance_sol = balance_lamports / 1e9
-            return f"Balance: {balance_sol:.9f} SOL"
+            if len(addresses) == 1:
+                return f"Balance: {balances[addresses[0]] / 1e9:.9f} SOL"
+            return "\n".join(f"{a}: {balances[a] / 1e9:.9f} SOL" for a in addresses)
 
         except Exception as e:
             logger.error(f"Error querying Solana balance: {e}")
             return f"Error: {str(e)}"
-        finally:
-            if client:
-                pass
-                # client.close()
 
+    @balance_cache
+    async def _arun(self, address: str) -> str:
+        """Async run the SOL balance check"""
+        # Pooled clients are bound to the shared background loop
+        return await run_in_background(self._check_balances(address))
+
+    @balance_cache
     def _run(self, address: str) -> str:
         """Synchronous run - wraps async method"""
-        return asyncio.run(self._arun(address))
+        return run_sync(self._check_balances(address))
 
 
 # Example usage:
@@ -60,6 +136,8 @@ async def main():
     result = await sol_balance_tool._arun(address)
     print(result)
 
+    await run_in_background(close_clients())
+
 
 if __name__ == "__main__":
     # Run example
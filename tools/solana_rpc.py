@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+from solana.exceptions import SolanaRpcException
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.core import _ClientCore
+from solana.rpc.providers.async_http import AsyncHTTPProvider
+from solana.rpc.providers.core import _parse_raw, _parse_raw_batch
+from solders.rpc.requests import Body
+
+DEFAULT_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+# Methods with side effects are never merged with an identical in-flight call
+NON_COALESCED_METHODS = {"sendTransaction", "requestAirdrop"}
+
+# Status codes worth retrying on the same or another endpoint
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def rpc_urls(urls: Optional[str] = None) -> List[str]:
+    """RPC endpoints in failover order.
+
+    urls is a comma separated list; it defaults to the SOLANA_RPC_URLS
+    environment variable and then to the public mainnet-beta endpoint.
+    """
+    urls = urls or os.getenv("SOLANA_RPC_URLS") or DEFAULT_RPC_URL
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Rate limits are per endpoint, so every client of an endpoint shares its bucket
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(url: str, rate: float = 10.0, burst: int = 20) -> TokenBucket:
+    """Return the process-wide token bucket for url"""
+    if url not in _buckets:
+        _buckets[url] = TokenBucket(rate, burst)
+    return _buckets[url]
+
+
+class ResilientHTTPProvider:
+    """Drop-in for AsyncHTTPProvider that spreads requests over several endpoints.
+
+    Identical read requests already in flight are coalesced into one HTTP call,
+    each endpoint is rate limited by a shared token bucket, and 429s, 5xx and
+    connection errors are retried with jittered exponential backoff on the
+    next endpoint in the list.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        timeout: float = 10,
+        extra_headers: Optional[Dict[str, str]] = None,
+        max_retries: int = 4,
+        backoff: float = 0.25,
+        rate: float = 10.0,
+        burst: int = 20,
+    ):
+        if not endpoints:
+            raise ValueError("At least one RPC endpoint is required")
+        self.providers = [
+            AsyncHTTPProvider(url, extra_headers=extra_headers, timeout=timeout)
+            for url in endpoints
+        ]
+        self.buckets = [get_bucket(url, rate, burst) for url in endpoints]
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.active = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def endpoint_uri(self):
+        # Read by driftpy to derive the websocket url
+        return self.providers[self.active].endpoint_uri
+
+    @property
+    def session(self):
+        return self.providers[self.active].session
+
+    def _coalesce_key(self, body: Body) -> Optional[str]:
+        request = json.loads(body.to_json())
+        if request.get("method") in NON_COALESCED_METHODS:
+            return None
+        request.pop("id", None)
+        return json.dumps(request, sort_keys=True)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = (
+            response.headers.get("retry-after") if response is not None else None
+        )
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+
+    async def _send(self, request):
+        """Run request(provider) with rate limiting, retries and failover"""
+        for attempt in range(self.max_retries + 1):
+            index = self.active
+            await self.buckets[index].acquire()
+            try:
+                return await request(self.providers[index])
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is not None and status not in RETRY_STATUS_CODES:
+                    raise SolanaRpcException(e) from e
+                if attempt == self.max_retries:
+                    raise SolanaRpcException(e) from e
+                # Fail over to the next endpoint for the retry
+                if index == self.active:
+                    self.active = (index + 1) % len(self.providers)
+                delay = self._retry_delay(attempt, e)
+                logger.warning(
+                    f"RPC {self.providers[index].endpoint_uri} failed ({e}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def make_request_unparsed(self, body: Body) -> str:
+        key = self._coalesce_key(body)
+        if key is None:
+            return await self._send(lambda p: p.make_request_unparsed(body))
+
+        if key not in self._in_flight:
+            future = asyncio.ensure_future(
+                self._send(lambda p: p.make_request_unparsed(body))
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(self._in_flight[key])
+
+    async def make_request(self, body: Body, parser):
+        raw = await self.make_request_unparsed(body)
+        return _parse_raw(raw, parser=parser)
+
+    async def make_batch_request_unparsed(self, reqs: Tuple[Body, ...]) -> str:
+        return await self._send(lambda p: p.make_batch_request_unparsed(reqs))
+
+    async def make_batch_request(self, reqs: Tuple[Body, ...], parsers):
+        raw = await self.make_batch_request_unparsed(reqs)
+        return _parse_raw_batch(raw, parsers)
+
+    async def __aenter__(self) -> "ResilientHTTPProvider":
+        for provider in self.providers:
+            await provider.__aenter__()
+        return self
+
+    async def close(self) -> None:
+        for provider in self.providers:
+            await provider.session.aclose()
+
+
+class ResilientAsyncClient(AsyncClient):
+    """AsyncClient whose requests go through a ResilientHTTPProvider.
+
+    is_connected() sends getHealth through the provider like any other call.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[List[str]] = None,
+        commitment=None,
+        timeout: float = 10,
+        **provider_kwargs,
+    ):
+        endpoints = endpoints or rpc_urls()
+        # AsyncClient.__init__ would open an AsyncHTTPProvider session that is
+        # never used, so only the shared client state is set up
+        _ClientCore.__init__(self, commitment)
+        self._provider = ResilientHTTPProvider(
+            endpoints, timeout=timeout, **provider_kwargs
+        )
+
+
+# Example usage: exercise coalescing, 429 retries, failover and health checks
+# on a local stub
+async def main():
+    from aiohttp import web
+
+    requests_seen = {"limited": 0, "healthy": 0}
+
+    async def limited(request):
+        requests_seen["limited"] += 1
+        return web.Response(status=429, headers={"Retry-After": "0"})
+
+    async def healthy(request):
+        requests_seen["healthy"] += 1
+        body = await request.json()
+        if body["method"] == "getHealth":
+            return web.json_response(
+                {"jsonrpc": "2.0", "result": "ok", "id": body["id"]}
+            )
+        await asyncio.sleep(0.05)
+        return web.json_response(
+            {
+                "jsonrpc": "2.0",
+                "result": {"context": {"slot": 1}, "value": 1_000_000_000},
+                "id": body["id"],
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/limited", limited)
+    app.router.add_post("/healthy", healthy)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 8899).start()
+
+    from solders.pubkey import Pubkey
+
+    client = ResilientAsyncClient(
+        ["http://127.0.0.1:8899/limited", "http://127.0.0.1:8899/healthy"],
+        backoff=0.01,
+    )
+    address = Pubkey.default()
+    balances = await asyncio.gather(*[client.get_balance(address) for _ in range(10)])
+    print([b.value for b in balances], requests_seen)
+    await client.close()
+
+    # Nothing listens on port 1, so the connection error fails over as well
+    async with ResilientAsyncClient(
+        ["http://127.0.0.1:1", "http://127.0.0.1:8899/healthy"], backoff=0.01
+    ) as client:
+        print((await client.get_balance(address)).value, await client.is_connected())
+
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
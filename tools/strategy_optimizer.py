@@ -0,0 +1,319 @@
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.backtesting_engine import (
+    MovingAverageCross,
+    RsiThreshold,
+    backtest_strategies,
+    candle_fingerprint,
+    load_candles,
+)
+
+# Batch strategy, integer parameter ranges (inclusive) and validity check
+SEARCH_SPACES: Dict[str, Tuple[type, Dict[str, Tuple[int, int]], Callable]] = {
+    "ma_cross": (
+        MovingAverageCross,
+        {"fast_ma": (2, 60), "slow_ma": (10, 250)},
+        lambda p: p["fast_ma"] < p["slow_ma"],
+    ),
+    "rsi": (
+        RsiThreshold,
+        {"period": (5, 40), "overbought": (55, 95), "oversold": (5, 45)},
+        lambda p: p["oversold"] < p["overbought"],
+    ),
+}
+
+
+@lru_cache(maxsize=4)
+def _candles(candle_file: str, mtime: float):
+    # One parse per file and worker process, reused by every task
+    return load_candles(candle_file)
+
+
+def _score(metrics: Dict, metric: str) -> float:
+    value = metrics.get(metric)
+    return float(value) if value is not None and np.isfinite(value) else -math.inf
+
+
+def evaluate(
+    candle_file: str,
+    strategy: str,
+    candidates: List[Dict[str, int]],
+    max_bars: Optional[int],
+    metric: str,
+) -> List[float]:
+    """Score candidates on the first max_bars candles; runs in the worker pool"""
+    strategy_class = SEARCH_SPACES[strategy][0]
+    candle_data = _candles(candle_file, os.path.getmtime(candle_file))
+    results = backtest_strategies(
+        candle_data, [strategy_class(**c) for c in candidates], max_bars=max_bars
+    )
+    return [_score(metrics, metric) for metrics, _ in results]
+
+
+class SweepResults:
+    """Scores of completed sweep cells, persisted as JSON lines at path.
+
+    A cell is one candidate backtested on one prefix length. Each line holds
+    the cell's parameters, bars and score with the candle file fingerprint,
+    strategy and metric, and lines of another version of the candles or of
+    another objective are ignored, so a rerun of an interrupted sweep only
+    evaluates the cells that are missing. Without a path, scores are only
+    kept in memory.
+    """
+
+    def __init__(
+        self, path: Optional[str], candle_file: str, strategy: str, metric: str
+    ):
+        self.path = path
+        self.context = {
+            "candles": candle_fingerprint(candle_file),
+            "strategy": strategy,
+            "metric": metric,
+        }
+        self._scores: Dict[tuple, float] = {}
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def key(params: Dict[str, int], bars: int) -> tuple:
+        return tuple(sorted(params.items())), bars
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            # Drop a line cut short by a crash, so appends start on a new line
+            with open(self.path, "r+b") as f:
+                f.truncate(len(complete))
+        for line in complete.decode().splitlines():
+            try:
+                cell = json.loads(line)
+            except ValueError:
+                continue
+            if all(cell.get(k) == v for k, v in self.context.items()):
+                self._scores[self.key(cell["params"], cell["bars"])] = cell["score"]
+
+    def get(self, params: Dict[str, int], bars: int) -> Optional[float]:
+        return self._scores.get(self.key(params, bars))
+
+    def add(self, cells: List[Dict[str, int]], bars: int, scores: List[float]):
+        for params, score in zip(cells, scores):
+            self._scores[self.key(params, bars)] = score
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            for params, score in zip(cells, scores):
+                cell = {**self.context, "params": params, "bars": bars}
+                f.write(json.dumps({**cell, "score": score}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class SuccessiveHalvingOptimizer:
+    """Successive halving search over a batch strategy's parameters.
+
+    Every rung backtests its candidates on a prefix of the candles eta times
+    longer than the previous rung's and keeps the best 1/eta, so poor
+    parameters are pruned after a short prefix and only the finalists see
+    every bar. Rung 0 is proposed adaptively: half of it is sampled at
+    random, the other half around the best of those. Candidates of a rung
+    are spread over a process pool in chunks that share indicators.
+
+    With results_path, every completed cell is persisted as it finishes
+    (see SweepResults); since proposals are seeded, rerunning an interrupted
+    search with the same arguments skips straight past the finished cells.
+    """
+
+    def __init__(
+        self,
+        candle_file: str,
+        strategy: str = "ma_cross",
+        metric: str = "Sharpe Ratio",
+        n_candidates: int = 81,
+        eta: int = 3,
+        min_bars: int = 500,
+        workers: Optional[int] = None,
+        seed: int = 0,
+        results_path: Optional[str] = None,
+        chunk_size: int = 32,
+    ):
+        self.candle_file = candle_file
+        self.strategy = strategy
+        self.metric = metric
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_bars = min_bars
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.results = SweepResults(results_path, candle_file, strategy, metric)
+        self.cells_reused = 0
+        self.rng = random.Random(seed)
+        _, self.space, self.valid = SEARCH_SPACES[strategy]
+        self.bars_evaluated = 0
+        self.history: List[Dict] = []
+
+    def _sample(self) -> Dict[str, int]:
+        while True:
+            candidate = {
+                name: self.rng.randint(low, high)
+                for name, (low, high) in self.space.items()
+            }
+            if self.valid(candidate):
+                return candidate
+
+    def _perturb(self, candidate: Dict[str, int]) -> Dict[str, int]:
+        """A valid neighbour of candidate, moved by up to 10% of each range"""
+        for _ in range(100):
+            neighbour = {}
+            for name, (low, high) in self.space.items():
+                step = max(1, round((high - low) * 0.1))
+                value = candidate[name] + self.rng.randint(-step, step)
+                neighbour[name] = min(high, max(low, value))
+            if self.valid(neighbour):
+                return neighbour
+        return self._sample()
+
+    def _evaluate(self, pool, candidates, max_bars) -> List[float]:
+        missing = [c for c in candidates if self.results.get(c, max_bars) is None]
+        self.cells_reused += len(candidates) - len(missing)
+
+        # Small enough chunks that finished cells are saved as the rung runs
+        chunk = min(self.chunk_size, math.ceil(len(missing) / self.workers)) or 1
+        futures = {
+            pool.submit(
+                evaluate,
+                self.candle_file,
+                self.strategy,
+                missing[i : i + chunk],
+                max_bars,
+                self.metric,
+            ): missing[i : i + chunk]
+            for i in range(0, len(missing), chunk)
+        }
+        for future in as_completed(futures):
+            self.results.add(futures[future], max_bars, future.result())
+        self.bars_evaluated += max_bars * len(missing)
+
+        scores = [self.results.get(c, max_bars) for c in candidates]
+        for candidate, score in zip(candidates, scores):
+            self.history.append({**candidate, "bars": max_bars, "score": score})
+        return scores
+
+    def _unique(self, candidates, seen) -> List[Dict[str, int]]:
+        unique = []
+        for candidate in candidates:
+            key = tuple(sorted(candidate.items()))
+            if key not in seen:
+                seen.add(key)
+                unique.append(candidate)
+        return unique
+
+    def run(self) -> Dict:
+        """Search and return the best parameters with the budget it took"""
+        total_bars = len(load_candles(self.candle_file))
+        rungs = max(
+            0, math.floor(math.log(max(total_bars / self.min_bars, 1), self.eta))
+        )
+        budgets = [
+            min(total_bars, math.ceil(total_bars / self.eta ** (rungs - k)))
+            for k in range(rungs + 1)
+        ]
+
+        seen = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            explore = self._unique(
+                [self._sample() for _ in range(self.n_candidates // 2)], seen
+            )
+            explore_scores = self._evaluate(pool, explore, budgets[0])
+
+            # Propose the other half of rung 0 around the best explorers
+            ranked = [c for _, c in sorted(zip(explore_scores, explore), key=_by_score)]
+            parents = ranked[: max(1, len(ranked) // 4)]
+            exploit = self._unique(
+                [
+                    self._perturb(parents[i % len(parents)])
+                    for i in range(self.n_candidates - len(explore))
+                ],
+                seen,
+            )
+            exploit_scores = self._evaluate(pool, exploit, budgets[0])
+
+            candidates = explore + exploit
+            scores = explore_scores + exploit_scores
+            for budget in budgets[1:]:
+                keep = max(1, len(candidates) // self.eta)
+                ranked = sorted(zip(scores, candidates), key=_by_score)[:keep]
+                candidates = [c for _, c in ranked]
+                scores = self._evaluate(pool, candidates, budget)
+
+        best_score, best = sorted(zip(scores, candidates), key=_by_score)[0]
+        return {
+            "best_params": best,
+            "best_score": best_score,
+            "metric": self.metric,
+            "budgets": budgets,
+            "candidates": len(seen),
+            "bars_evaluated": self.bars_evaluated,
+            "cells_reused": self.cells_reused,
+            # What backtesting every candidate on every bar would have cost
+            "full_evaluation_bars": len(seen) * total_bars,
+        }
+
+
+def _by_score(pair):
+    return -pair[0]
+
+
+def sweep(
+    candle_file: str,
+    strategy: str,
+    grid: Dict[str, List[int]],
+    metric: str = "Sharpe Ratio",
+    results_path: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> List[Tuple[float, Dict[str, int]]]:
+    """Backtest every valid combination of grid on all candles.
+
+    grid maps parameter names to their values. With results_path, completed
+    cells are persisted and reused as in SuccessiveHalvingOptimizer.
+    Returns (score, params) pairs, best first.
+    """
+    optimizer = SuccessiveHalvingOptimizer(
+        candle_file, strategy, metric, workers=workers, results_path=results_path
+    )
+    candidates = [
+        dict(zip(grid, values)) for values in itertools.product(*grid.values())
+    ]
+    candidates = [c for c in candidates if optimizer.valid(c)]
+    total_bars = len(load_candles(candle_file))
+    with ProcessPoolExecutor(max_workers=optimizer.workers) as pool:
+        scores = optimizer._evaluate(pool, candidates, total_bars)
+    return sorted(zip(scores, candidates), key=_by_score)
+
+
+def optimize(candle_file: str, strategy: str = "ma_cross", **kwargs) -> Dict:
+    """Find good parameters for a batch strategy on candle_file"""
+    return SuccessiveHalvingOptimizer(candle_file, strategy, **kwargs).run()
+
+
+# Example usage:
+if __name__ == "__main__":
+    result = optimize("./data/perp_SOL_15_2024.csv", "ma_cross")
+    print(result)
@@ -0,0 +1,217 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+
+from loguru import logger
+
+DEFAULT_CACHE_DIR = os.getenv("TOOL_CACHE_DIR", ".tool_cache")
+
+# Every ToolCache by tool name, for cache_stats()
+_caches: Dict[str, "ToolCache"] = {}
+
+
+def _not_an_error(result) -> bool:
+    return not (isinstance(result, str) and result.startswith("Error"))
+
+
+class TTLCache:
+    """Dict-like cache whose entries expire ttl seconds after they are set"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return default
+        return entry[0]
+
+    def set(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+
+    def age(self, key):
+        """Seconds since key was set, or None if it never was"""
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ToolCache:
+    """Memoizes a tool's results by its normalized arguments.
+
+    key(tool, args) maps the tool instance and its call arguments (by name)
+    to the values that identify a result, e.g. the upper-cased symbol;
+    anything JSON serializable works. ttl is the lifetime of a result in
+    seconds, None for results that never expire, or a callable taking the
+    arguments. Results are kept in an in-memory LRU of max_entries and, when
+    persist is set, as JSON files under cache_dir/name so they survive
+    restarts. Only results passing `cacheable` are stored; by default tool
+    error messages are not. A stored result failing `validate`, e.g. one
+    naming a file that has since been deleted, counts as a miss.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Union[float, None, Callable[[Dict[str, Any]], Optional[float]]],
+        key: Optional[Callable[[Any, Dict[str, Any]], Any]] = None,
+        max_entries: int = 256,
+        persist: bool = True,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        cacheable: Callable[[Any], bool] = _not_an_error,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.key = key or (lambda tool, args: args)
+        self.max_entries = max_entries
+        self.persist = persist
+        self.cache_dir = os.path.join(cache_dir, name)
+        self.cacheable = cacheable
+        self.validate = validate
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def make_key(self, tool, args: Dict[str, Any]) -> str:
+        normalized = self.key(tool, args)
+        return hashlib.sha256(
+            json.dumps(normalized, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _expires_at(self, args: Dict[str, Any]) -> Optional[float]:
+        ttl = self.ttl(args) if callable(self.ttl) else self.ttl
+        return None if ttl is None else time.time() + ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key: str, value, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["value"], entry["expires_at"]
+
+    def get(self, key: str):
+        """Cached result for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        source = "memory"
+        if entry is None and self.persist:
+            entry = self._read_disk(key)
+            source = "disk"
+
+        if (
+            entry is None
+            or (entry[1] is not None and entry[1] < time.time())
+            or (self.validate is not None and not self.validate(entry[0]))
+        ):
+            with self._lock:
+                self._entries.pop(key, None)
+                self.misses += 1
+            return None
+
+        if source == "disk":
+            self._remember(key, *entry)
+        with self._lock:
+            self.hits += 1
+            if source == "disk":
+                self.disk_hits += 1
+        return entry[0]
+
+    def set(self, key: str, value, args: Dict[str, Any]) -> None:
+        if not self.cacheable(value):
+            return
+        expires_at = self._expires_at(args)
+        self._remember(key, value, expires_at)
+        if not self.persist:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            partial_path = f"{self._path(key)}.{os.getpid()}.part"
+            with open(partial_path, "w") as f:
+                json.dump({"value": value, "expires_at": expires_at}, f)
+            os.replace(partial_path, self._path(key))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not persist {self.name} cache entry: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry, in memory and on disk, and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if os.path.isdir(self.cache_dir):
+            for file_name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def __call__(self, method):
+        """Decorate a tool's _run or _arun so repeated calls are served from cache"""
+        signature = inspect.signature(method)
+
+        def call_args(tool, args, kwargs):
+            bound = signature.bind(tool, *args, **kwargs)
+            return {k: v for k, v in bound.arguments.items() if k != "self"}
+
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(tool, *args, **kwargs):
+                arguments = call_args(tool, args, kwargs)
+                key = self.make_key(tool, arguments)
+                result = self.get(key)
+                if result is None:
+                    result = await method(tool, *args, **kwargs)
+                    self.set(key, result, arguments)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(tool, *args, **kwargs):
+            arguments = call_args(tool, args, kwargs)
+            key = self.make_key(tool, arguments)
+            result = self.get(key)
+            if result is None:
+                result = method(tool, *args, **kwargs)
+                self.set(key, result, arguments)
+            return result
+
+        return wrapper
+
+
+def cache_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    """Hit and miss counters of every tool cache, by tool name"""
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,100 @@
+from typing import Dict, List, Union
+
+from pydantic import BaseModel, Field
+
+# Descriptions and argument schemas of the agent's tools. Both the tool
+# classes and tools.registry use them, so the model sees the same text
+# whether a tool is loaded or not; this module only imports pydantic.
+
+
+class SolanaBalanceInput(BaseModel):
+    address: str = Field(
+        description="Solana wallet address, or several addresses separated by commas"
+    )
+
+
+class DriftCandleDataInput(BaseModel):
+    base_asset_symbol: str = Field(description='Base asset symbol (e.g., "SOL")')
+    resolution: str = Field(
+        description='Candle resolution: "1", "15", "60", "240", "D" or "W"'
+    )
+    year: str = Field(description='Year of data (e.g., "2024")')
+
+
+class BacktestingInput(BaseModel):
+    strategy_code: str = Field(description="Python code of the strategy function")
+    data_file: str = Field(description="Path to the CSV file with historical data")
+
+
+class BacktestResultInput(BaseModel):
+    result_id: str = Field(description="result_id returned by BacktestingTool")
+    offset: int = Field(default=0, description="Index of the first trade to return")
+    limit: int = Field(default=20, description="Number of trades to return")
+
+
+class DriftOrderInput(BaseModel):
+    amount: float = Field(description="Amount to trade")
+    direction: str = Field(description="'long' or 'short'")
+    symbol: str = Field(description="Symbol/ticker to trade (e.g. SOL)")
+
+
+class DriftBatchOrderInput(BaseModel):
+    orders: List[Dict[str, Union[str, float]]] = Field(
+        description="Orders, each with 'amount', 'direction' and 'symbol'"
+    )
+
+
+SOLANA_BALANCE_DESCRIPTION = """
+    Useful for checking SOL balance of one or more Solana wallet addresses.
+    Input should be a valid Solana public key/wallet address, or several
+    addresses separated by commas.
+    Returns the balance in SOL of each address.
+    """
+
+DRIFT_CANDLE_DATA_DESCRIPTION = """
+    Downloads historical candle data from Drift exchange.
+    Use this tool to download data for the ticker a user is interested in.
+    Input should be a JSON string with the following parameters:
+    - base_asset_symbol: Base asset symbol (e.g., "SOL")
+    - resolution: Candle resolution: "1", "15", "60", "240", "D", "W".
+    "1" is for a 1 minute candle, "15" is for 15 minute candles, "60" is for 1 hour candles,
+    "240" is for 4 hours candles, "D" is for daily candles, "W" is for weekly candles
+    - year: Year of data (e.g., "2024")
+    Returns the path to the downloaded CSV file. If an error occurs, it will return an error message.
+    """
+
+BACKTESTING_DESCRIPTION = """Use this tool to backtest a trading strategy on historical data.
+    Inputs are the strategy code and the historical candle data file:
+    - 'strategy_code': Python code of the strategy function as string
+    - 'data_file': Path to the CSV file with historical data
+    The strategy function should follow this template:
+    def strategy(window_data: pd.DataFrame, positions: pd.DataFrame) -> Optional[Dict[str, Union[int, float, datetime]]]
+    """
+
+BACKTEST_RESULT_DESCRIPTION = """Use this tool to look at the trades of a previous backtest
+    instead of running it again.
+    Inputs are:
+    - 'result_id': the result_id returned by BacktestingTool
+    - 'offset': index of the first trade to return (default 0)
+    - 'limit': number of trades to return (default 20)
+    Returns the total number of positions and the requested positions as JSON.
+    """
+
+DRIFT_ORDER_DESCRIPTION = """Use this tool to place orders on Drift Exchange.
+    Input should be a JSON string containing:
+    - 'amount': float (amount to trade)
+    - 'direction': string ('long' or 'short')
+    - 'symbol': symbol/ticker to trade (e.g. SOL)
+    Example: amount 0.1, direction: "long", symbol: ETH
+    This tool returns the transaction signature on successful execution.
+    """
+
+DRIFT_BATCH_ORDER_DESCRIPTION = """Use this tool to place orders on several Drift markets at once,
+    for example to rebalance a portfolio.
+    Input should be a JSON string containing:
+    - 'orders': list of orders, each with 'amount' (float), 'direction' ('long' or 'short')
+    and 'symbol' (e.g. SOL)
+    Example: orders: [{"amount": 0.1, "direction": "long", "symbol": "SOL"},
+    {"amount": 0.001, "direction": "short", "symbol": "BTC"}]
+    This tool returns the transaction signature and status of every order.
+    """